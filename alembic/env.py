@@ -9,7 +9,8 @@ from app.database.config import get_database_url
 # Import models so metadata is populated for autogenerate.
 from app.auth.models import User  # noqa: F401
 from app.college.models import College  # noqa: F401
-from app.game.models import HexTile  # noqa: F401
+from app.game.models import HexChunk, HexTile, TileChange  # noqa: F401
+from app.mana.models import StepDevice  # noqa: F401
 
 config = context.config
 
@@ -0,0 +1,39 @@
+"""hex chunks
+
+Revision ID: 0002_hex_chunks
+Revises: 0001_initial_schema
+Create Date: 2026-10-17 09:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002_hex_chunks"
+down_revision = "0001_initial_schema"
+branch_labels = None
+depends_on = None
+
+CHUNK_SIZE = 16
+
+
+def upgrade() -> None:
+    op.create_table(
+        "hex_chunks",
+        sa.Column("chunk_q", sa.Integer(), nullable=False),
+        sa.Column("chunk_r", sa.Integer(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.CheckConstraint("version >= 1", name="ck_hex_chunks_version_min"),
+        sa.PrimaryKeyConstraint("chunk_q", "chunk_r"),
+    )
+
+    op.execute(
+        "INSERT INTO hex_chunks (chunk_q, chunk_r, version) "
+        f"SELECT DISTINCT floor(q::numeric / {CHUNK_SIZE})::int, floor(r::numeric / {CHUNK_SIZE})::int, 1 "
+        "FROM hex_tiles"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("hex_chunks")
@@ -0,0 +1,23 @@
+"""hex tiles (r, q) index
+
+Revision ID: 0003_hex_tiles_r_q_index
+Revises: 0002_hex_chunks
+Create Date: 2026-10-17 10:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0003_hex_tiles_r_q_index"
+down_revision = "0002_hex_chunks"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_hex_tiles_r_q", "hex_tiles", ["r", "q"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_hex_tiles_r_q", table_name="hex_tiles")
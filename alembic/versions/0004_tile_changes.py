@@ -0,0 +1,37 @@
+"""tile change log
+
+Revision ID: 0004_tile_changes
+Revises: 0003_hex_tiles_r_q_index
+Create Date: 2026-10-17 11:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004_tile_changes"
+down_revision = "0003_hex_tiles_r_q_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tile_changes",
+        sa.Column("seq", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("tile_id", sa.Integer(), nullable=False),
+        sa.Column("q", sa.Integer(), nullable=False),
+        sa.Column("r", sa.Integer(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=True),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["tile_id"], ["hex_tiles.id"]),
+        sa.PrimaryKeyConstraint("seq"),
+    )
+    op.create_index(op.f("ix_tile_changes_changed_at"), "tile_changes", ["changed_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_tile_changes_changed_at"), table_name="tile_changes")
+    op.drop_table("tile_changes")
@@ -0,0 +1,40 @@
+"""users tiles_owned counter
+
+Revision ID: 0005_users_tiles_owned
+Revises: 0004_tile_changes
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0005_users_tiles_owned"
+down_revision = "0004_tile_changes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("tiles_owned", sa.Integer(), nullable=False, server_default="0"))
+    op.execute(
+        """
+        UPDATE users
+        SET tiles_owned = owned.total
+        FROM (
+            SELECT owner_id, count(*) AS total
+            FROM hex_tiles
+            WHERE owner_id IS NOT NULL
+            GROUP BY owner_id
+        ) AS owned
+        WHERE users.id = owned.owner_id
+        """
+    )
+    op.alter_column("users", "tiles_owned", server_default=None)
+    op.create_check_constraint("ck_users_tiles_owned_non_negative", "users", "tiles_owned >= 0")
+
+
+def downgrade() -> None:
+    op.drop_constraint("ck_users_tiles_owned_non_negative", "users", type_="check")
+    op.drop_column("users", "tiles_owned")
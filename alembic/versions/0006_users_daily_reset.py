@@ -0,0 +1,36 @@
+"""users timezone and daily mana reset date
+
+Revision ID: 0006_users_daily_reset
+Revises: 0005_users_tiles_owned
+Create Date: 2026-10-17 13:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0006_users_daily_reset"
+down_revision = "0005_users_tiles_owned"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("timezone", sa.String(length=64), nullable=False, server_default="UTC"))
+    op.add_column(
+        "users",
+        sa.Column(
+            "daily_mana_reset_on",
+            sa.Date(),
+            nullable=False,
+            server_default=sa.text("(now() AT TIME ZONE 'UTC')::date"),
+        ),
+    )
+    op.alter_column("users", "timezone", server_default=None)
+    op.alter_column("users", "daily_mana_reset_on", server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_column("users", "daily_mana_reset_on")
+    op.drop_column("users", "timezone")
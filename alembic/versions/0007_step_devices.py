@@ -0,0 +1,33 @@
+"""step devices
+
+Revision ID: 0007_step_devices
+Revises: 0006_users_daily_reset
+Create Date: 2026-10-17 14:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0007_step_devices"
+down_revision = "0006_users_daily_reset"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "step_devices",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("device_id", sa.String(length=128), nullable=False),
+        sa.Column("last_sample_at", sa.DateTime(), nullable=True),
+        sa.Column("pending_steps", sa.Integer(), nullable=False),
+        sa.CheckConstraint("pending_steps >= 0", name="ck_step_devices_pending_steps_non_negative"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "device_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("step_devices")
@@ -0,0 +1,36 @@
+"""tile changes txid
+
+Revision ID: 0008_tile_changes_txid
+Revises: 0007_step_devices
+Create Date: 2026-10-17 15:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0008_tile_changes_txid"
+down_revision = "0007_step_devices"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows take this migration's transaction id, so cursors issued
+    # before it resync once instead of being read as transaction ids.
+    op.add_column(
+        "tile_changes",
+        sa.Column(
+            "txid",
+            sa.BigInteger(),
+            nullable=False,
+            server_default=sa.text("pg_current_xact_id()::text::bigint"),
+        ),
+    )
+    op.create_index(op.f("ix_tile_changes_txid"), "tile_changes", ["txid"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_tile_changes_txid"), table_name="tile_changes")
+    op.drop_column("tile_changes", "txid")
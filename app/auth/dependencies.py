@@ -1,15 +1,51 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.auth.models import User
+from app.auth.principals import Principal, get_principal_cache
+from app.core.cache import TTLCache
 from app.auth.security import decode_access_token
-from app.database.session import get_db
+from app.database.session import get_async_db, get_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Only identity columns are loaded, so no User instance lands in the request's
+# session and writers always read fresh state through their own locked SELECT.
+_PRINCIPAL_COLUMNS = (User.id, User.email, User.college_id)
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    user_id = _user_id_from_token(token)
+    cache = get_principal_cache()
+    principal = cache.get(user_id)
+    if principal is None:
+        row = db.execute(select(*_PRINCIPAL_COLUMNS).where(User.id == user_id)).first()
+        principal = _cache_principal(cache, row)
+    return principal
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    user_id = _user_id_from_token(token)
+    cache = get_principal_cache()
+    principal = cache.get(user_id)
+    if principal is None:
+        row = (await db.execute(select(*_PRINCIPAL_COLUMNS).where(User.id == user_id))).first()
+        principal = _cache_principal(cache, row)
+    return principal
+
+
+def _cache_principal(cache: TTLCache, row) -> Principal:
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    principal = Principal(id=row.id, email=row.email, college_id=row.college_id)
+    cache.set(principal.id, principal)
+    return principal
+
+
+def _user_id_from_token(token: str) -> int:
     try:
         payload = decode_access_token(token)
         user_id = int(payload.get("sub"))
@@ -17,8 +53,4 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise ValueError("Invalid token subject")
     except (TypeError, ValueError):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication token")
-
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    return user_id
@@ -0,0 +1,75 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
+from fastapi import HTTPException, status
+
+from app.auth.security import hash_password, verify_password
+from app.core.metrics import PASSWORD_HASH_PENDING, PASSWORD_HASH_QUEUE_WAIT, PASSWORD_HASH_REJECTIONS
+
+
+def _timed_call(fn, *args):
+    return time.time(), fn(*args)
+
+
+class PasswordHasherPool:
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: ProcessPoolExecutor | None = None
+        # Only touched from the event loop, so no lock is needed.
+        self._pending = 0
+
+    async def hash_password(self, password: str) -> tuple[str, float]:
+        return await self._run("hash", hash_password, password)
+
+    async def verify_password(self, plain_password: str, hashed_password: str) -> tuple[bool, float]:
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, operation: str, fn, *args):
+        if self._pending >= self.max_pending:
+            PASSWORD_HASH_REJECTIONS.labels(operation).inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service busy",
+                headers={"Retry-After": "1"},
+            )
+
+        self._pending += 1
+        PASSWORD_HASH_PENDING.inc()
+        submitted_at = time.time()
+        try:
+            started_at, result = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), partial(_timed_call, fn, *args)
+            )
+        finally:
+            self._pending -= 1
+            PASSWORD_HASH_PENDING.dec()
+
+        queue_wait_seconds = max(0.0, started_at - submitted_at)
+        PASSWORD_HASH_QUEUE_WAIT.labels(operation).observe(queue_wait_seconds)
+        return result, queue_wait_seconds
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Forking a process that already runs an event loop and threads is unsafe.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+
+@lru_cache
+def get_password_hasher() -> PasswordHasherPool:
+    workers = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    max_pending = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+    return PasswordHasherPool(workers=workers, max_pending=max_pending)
@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
 
-from sqlalchemy import CheckConstraint, DateTime, ForeignKey, Integer, String
+from sqlalchemy import CheckConstraint, Date, DateTime, ForeignKey, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database.base import Base
@@ -13,6 +13,7 @@ class User(Base):
         CheckConstraint("mana <= 200", name="ck_users_mana_max_cap"),
         CheckConstraint("daily_mana_earned >= 0", name="ck_users_daily_mana_non_negative"),
         CheckConstraint("daily_mana_earned <= 200", name="ck_users_daily_mana_max_cap"),
+        CheckConstraint("tiles_owned >= 0", name="ck_users_tiles_owned_non_negative"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
@@ -21,4 +22,7 @@ class User(Base):
     mana: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     last_regen_time: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
     daily_mana_earned: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    daily_mana_reset_on: Mapped[date] = mapped_column(Date, nullable=False, default=lambda: datetime.utcnow().date())
+    timezone: Mapped[str] = mapped_column(String(64), nullable=False, default="UTC")
+    tiles_owned: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     college_id: Mapped[int | None] = mapped_column(ForeignKey("colleges.id"), nullable=True, index=True)
@@ -0,0 +1,23 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+from app.core.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    college_id: int | None
+
+
+@lru_cache
+def get_principal_cache() -> TTLCache:
+    max_entries = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+    ttl_seconds = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+    return TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+
+def evict_principal(user_id: int) -> None:
+    get_principal_cache().pop(user_id)
@@ -1,39 +1,92 @@
 import logging
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, text
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
 
+from app.auth.dependencies import get_current_user_async
+from app.auth.hashing import get_password_hasher
 from app.auth.models import User
-from app.auth.schemas import LoginRequest, RegisterRequest, TokenResponse
-from app.auth.security import create_access_token, hash_password, verify_password
-from app.database.session import get_db
+from app.auth.principals import Principal
+from app.auth.schemas import LoginRequest, RegisterRequest, TimezoneUpdateRequest, TokenResponse
+from app.auth.security import create_access_token
+from app.database.session import AsyncSessionLocal
+from app.mana.service import local_today
 
 router = APIRouter()
 logger = logging.getLogger("steprealm.auth")
 
+# The daily reset resolves zones in PostgreSQL, whose zone database is not the
+# one zoneinfo reads, so a timezone has to be known to both. Loaded once.
+_postgres_timezones: frozenset[str] | None = None
+
 
 @router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-def register(payload: RegisterRequest, db: Session = Depends(get_db)) -> TokenResponse:
-    user = User(email=payload.email, hashed_password=hash_password(payload.password))
+async def register(payload: RegisterRequest) -> TokenResponse:
+    await _check_postgres_timezone(payload.timezone)
+    hashed_password, queue_wait_seconds = await get_password_hasher().hash_password(payload.password)
+    user = User(
+        email=payload.email,
+        hashed_password=hashed_password,
+        timezone=payload.timezone,
+        daily_mana_reset_on=local_today(payload.timezone),
+    )
     try:
-        with db.begin():
-            db.add(user)
-            db.flush()
+        async with AsyncSessionLocal() as db:
+            async with db.begin():
+                db.add(user)
+                await db.flush()
     except IntegrityError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
     token = create_access_token(str(user.id))
+    logger.info("register_success", extra={"user_id": user.id, "hash_queue_wait_ms": round(queue_wait_seconds * 1000, 1)})
     return TokenResponse(access_token=token)
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(payload: LoginRequest, db: Session = Depends(get_db)) -> TokenResponse:
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.hashed_password):
+async def login(payload: LoginRequest) -> TokenResponse:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User.id, User.hashed_password).where(User.email == payload.email))
+        user = result.first()
+
+    password_ok = False
+    queue_wait_seconds = 0.0
+    if user:
+        password_ok, queue_wait_seconds = await get_password_hasher().verify_password(payload.password, user.hashed_password)
+    if not password_ok:
         logger.warning("login_failed")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     token = create_access_token(str(user.id))
-    logger.info("login_success", extra={"user_id": user.id})
+    logger.info("login_success", extra={"user_id": user.id, "hash_queue_wait_ms": round(queue_wait_seconds * 1000, 1)})
     return TokenResponse(access_token=token)
+
+
+@router.put("/timezone")
+async def update_timezone(
+    payload: TimezoneUpdateRequest,
+    current_user: Principal = Depends(get_current_user_async),
+) -> dict:
+    await _check_postgres_timezone(payload.timezone)
+    async with AsyncSessionLocal() as db:
+        async with db.begin():
+            result = await db.execute(select(User).where(User.id == current_user.id).with_for_update())
+            user = result.scalar_one()
+            user.timezone = payload.timezone
+            # Changing zone never resets the daily counter early: the reset date
+            # only moves forward, to today in the new zone if that is later.
+            user.daily_mana_reset_on = max(user.daily_mana_reset_on, local_today(payload.timezone))
+            reset_on = user.daily_mana_reset_on
+
+    return {"timezone": payload.timezone, "daily_mana_reset_on": reset_on.isoformat()}
+
+
+async def _check_postgres_timezone(timezone: str) -> None:
+    global _postgres_timezones
+    if _postgres_timezones is None:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(text("SELECT name FROM pg_timezone_names"))
+            _postgres_timezones = frozenset(result.scalars())
+    if timezone not in _postgres_timezones:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown timezone")
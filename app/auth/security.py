@@ -1,14 +1,23 @@
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import hashlib
 import os
+import time
 
 from dotenv import load_dotenv
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
+from app.core.cache import TTLCache
+
 
 load_dotenv()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+)
 
 
 def hash_password(password: str) -> str:
@@ -19,7 +28,8 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def _get_jwt_settings() -> tuple[str, str]:
+@lru_cache
+def get_jwt_settings() -> tuple[str, str]:
     secret_key = os.getenv("JWT_SECRET_KEY")
     if not secret_key:
         raise RuntimeError("JWT_SECRET_KEY environment variable is not set.")
@@ -28,7 +38,7 @@ def _get_jwt_settings() -> tuple[str, str]:
 
 
 def create_access_token(subject: str) -> str:
-    secret_key, algorithm = _get_jwt_settings()
+    secret_key, algorithm = get_jwt_settings()
     expire_minutes = int(os.getenv("JWT_EXPIRE_MINUTES", "60"))
 
     now = datetime.now(timezone.utc)
@@ -43,8 +53,20 @@ def create_access_token(subject: str) -> str:
     return jwt.encode(payload, secret_key, algorithm=algorithm)
 
 
+@lru_cache
+def get_verified_token_cache() -> TTLCache:
+    max_entries = int(os.getenv("JWT_CACHE_MAX_ENTRIES", "10000"))
+    return TTLCache(max_entries=max_entries, ttl_seconds=24 * 60 * 60)
+
+
 def decode_access_token(token: str) -> dict:
-    secret_key, algorithm = _get_jwt_settings()
+    cache = get_verified_token_cache()
+    cache_key = hashlib.sha256(token.encode()).digest()
+    payload = cache.get(cache_key)
+    if payload is not None:
+        return payload
+
+    secret_key, algorithm = get_jwt_settings()
     try:
         payload = jwt.decode(
             token,
@@ -57,4 +79,7 @@ def decode_access_token(token: str) -> dict:
 
     if payload.get("type") != "access":
         raise ValueError("Invalid token")
+
+    # Cached payloads are shared between requests and must be treated as read-only.
+    cache.set(cache_key, payload, ttl_seconds=payload["exp"] - time.time())
     return payload
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 
 from app.auth.dependencies import get_current_user
 from app.auth.models import User
+from app.auth.principals import Principal, evict_principal
 from app.college.models import College
 from app.college.schemas import JoinCollegeRequest
 from app.database.session import get_db
@@ -11,7 +12,7 @@ router = APIRouter()
 
 
 @router.post("/join")
-def join_college(payload: JoinCollegeRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> dict:
+def join_college(payload: JoinCollegeRequest, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)) -> dict:
     try:
         college = db.query(College).filter(College.join_code == payload.join_code).first()
         if not college:
@@ -27,6 +28,8 @@ def join_college(payload: JoinCollegeRequest, current_user: User = Depends(get_c
         db.rollback()
         raise
 
+    evict_principal(current_user.id)
+
     return {
         "college_id": college.id,
         "college_name": college.name,
@@ -0,0 +1,25 @@
+import hashlib
+
+from fastapi import Response, status
+
+ETAG_DIGEST_SIZE = 12
+
+
+def make_etag(*parts: object, weak: bool = False) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=ETAG_DIGEST_SIZE).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored on both sides.
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def not_modified(etag: str, headers: dict[str, str] | None = None) -> Response:
+    # A 304 has to repeat the Vary and validator headers the full response would carry.
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={**(headers or {}), "ETag": etag})
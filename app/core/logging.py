@@ -1,50 +1,118 @@
-import json
+import atexit
+import copy
 import logging
+import os
+import queue
+import random
 import sys
+import threading
 from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+
+LOG_QUEUE_SIZE = 10000
+
+STANDARD_RECORD_ATTRS = frozenset(logging.LogRecord("", logging.INFO, "", 0, "", None, None).__dict__) | {
+    "message",
+    "asctime",
+}
 
 
 class JsonFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
         payload = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
         }
 
-        standard_attrs = {
-            "name",
-            "msg",
-            "args",
-            "levelname",
-            "levelno",
-            "pathname",
-            "filename",
-            "module",
-            "exc_info",
-            "exc_text",
-            "stack_info",
-            "lineno",
-            "funcName",
-            "created",
-            "msecs",
-            "relativeCreated",
-            "thread",
-            "threadName",
-            "processName",
-            "process",
-        }
         for key, value in record.__dict__.items():
-            if key in standard_attrs or key.startswith("_"):
+            if key in STANDARD_RECORD_ATTRS or key.startswith("_"):
                 continue
             if isinstance(value, (str, int, float, bool)) or value is None:
                 payload[key] = value
 
         if record.exc_info:
             payload["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exception"] = record.exc_text
+
+        return orjson.dumps(payload).decode()
 
-        return json.dumps(payload)
+
+class SamplingFilter(logging.Filter):
+    # Rates are keyed by event name (the log message). Warnings and errors are
+    # never sampled. Kept records carry their rate so counts can be reweighted.
+    def __init__(self, rates: dict[str, float]) -> None:
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.msg) if record.levelno < logging.WARNING else None
+        if rate is None:
+            return True
+        if random.random() >= rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    # Request threads only enqueue; a full queue drops the record instead of
+    # blocking, and the number dropped is logged once the queue has room again.
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._lock = threading.Lock()
+        self._exception_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Arguments and tracebacks are rendered on the calling thread, before the
+        # objects they refer to can change or be freed.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        if self.dropped != self._reported_dropped:
+            self._report_dropped()
+
+    def _report_dropped(self) -> None:
+        with self._lock:
+            dropped = self.dropped - self._reported_dropped
+            self._reported_dropped = self.dropped
+        if not dropped:
+            return
+        record = logging.LogRecord("steprealm.logging", logging.WARNING, __file__, 0, "log_records_dropped", None, None)
+        record.dropped = dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._reported_dropped -= dropped
+
+
+def parse_sample_rates(value: str) -> dict[str, float]:
+    rates = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        event, _, rate = item.partition("=")
+        rates[event.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
 
 
 def configure_logging() -> None:
@@ -52,7 +120,14 @@ def configure_logging() -> None:
     if root_logger.handlers:
         return
 
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(JsonFormatter())
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", str(LOG_QUEUE_SIZE)))))
+    queue_handler.addFilter(SamplingFilter(parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", ""))))
+
+    listener = QueueListener(queue_handler.queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
     root_logger.setLevel(logging.INFO)
-    root_logger.addHandler(handler)
+    root_logger.addHandler(queue_handler)
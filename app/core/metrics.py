@@ -0,0 +1,108 @@
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# With PROMETHEUS_MULTIPROC_DIR set (before the workers start, on an emptied
+# directory) every worker writes its samples to files there and /metrics sums
+# them, so any worker can answer the scrape. Without it, metrics are per process.
+MULTIPROCESS_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+UNMATCHED_ROUTE = "<unmatched>"
+
+HTTP_REQUEST_DURATION = Histogram(
+    "steprealm_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HTTP_REQUESTS = Counter("steprealm_http_requests", "HTTP responses by route template and status.", ["method", "route", "status"])
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "steprealm_http_requests_in_progress", "HTTP requests being handled.", ["method"], multiprocess_mode="livesum"
+)
+
+TILE_CLAIMS = Counter("steprealm_tile_claims", "Tile claim outcomes by result.", ["result"])
+MANA_AWARDED = Counter("steprealm_mana_awarded", "Mana awarded for steps.", ["source"])
+RATE_LIMIT_REJECTIONS = Counter("steprealm_rate_limit_rejections", "Requests rejected by rate limiting.", ["scope"])
+
+PASSWORD_HASH_QUEUE_WAIT = Histogram(
+    "steprealm_password_hash_queue_wait_seconds",
+    "Time password hashing jobs wait for a pool worker.",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+PASSWORD_HASH_REJECTIONS = Counter(
+    "steprealm_password_hash_rejections", "Password hashing jobs rejected because the pool was full.", ["operation"]
+)
+PASSWORD_HASH_PENDING = Gauge(
+    "steprealm_password_hash_pending", "Password hashing jobs queued or running.", multiprocess_mode="livesum"
+)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    if os.getenv(MULTIPROCESS_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    # Drops this worker's live gauge files so in-progress counts do not leak after it exits.
+    if os.getenv(MULTIPROCESS_DIR_ENV):
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware, so responses are not re-wrapped
+    # and streaming bodies keep streaming. Requests are labelled by route
+    # template, which keeps label cardinality bounded by the app's routes.
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            route = _route_template(scope)
+            HTTP_REQUEST_DURATION.labels(method, route).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+
+
+def _route_template(scope) -> str:
+    # Included routers may leave a route whose path lacks their prefix, so the
+    # template is rebuilt from the request path by putting the matched path
+    # parameters back in place of their values.
+    if scope.get("route") is None:
+        return UNMATCHED_ROUTE
+    params = {str(value): f"{{{name}}}" for name, value in scope.get("path_params", {}).items()}
+    if not params:
+        return scope["path"]
+    return "/".join(params.get(segment, segment) for segment in scope["path"].split("/"))
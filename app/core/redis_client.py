@@ -2,9 +2,18 @@ import os
 from functools import lru_cache
 
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+
+def get_redis_url() -> str:
+    return os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
 
 @lru_cache
 def get_redis_client() -> Redis:
-    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-    return Redis.from_url(redis_url, decode_responses=True)
+    return Redis.from_url(get_redis_url(), decode_responses=True)
+
+
+@lru_cache
+def get_async_redis_client() -> AsyncRedis:
+    return AsyncRedis.from_url(get_redis_url(), decode_responses=True)
@@ -1,19 +1,175 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
 from fastapi import HTTPException, status
 from redis.exceptions import RedisError
 
-from app.core.redis_client import get_redis_client
+from app.core.metrics import RATE_LIMIT_REJECTIONS
+from app.core.redis_client import get_async_redis_client, get_redis_client
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    limit: int
+    window_seconds: int
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.limit / self.window_seconds
+
+
+RATE_LIMIT_POLICIES: dict[str, RateLimitPolicy] = {
+    "claim_tile": RateLimitPolicy(limit=10, window_seconds=10),
+    "claim_by_location": RateLimitPolicy(limit=8, window_seconds=30),
+    "claim_batch": RateLimitPolicy(limit=3, window_seconds=60),
+    "claim_trace": RateLimitPolicy(limit=3, window_seconds=60),
+    "add_steps": RateLimitPolicy(limit=6, window_seconds=60),
+    "step_samples": RateLimitPolicy(limit=6, window_seconds=60),
+}
+
+# Token bucket evaluated atomically on the Redis server, using the server clock
+# so every API node agrees on refill timing. Returns {allowed, retry_after_ms}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_per_ms = tonumber(ARGV[2])
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now_ms
+end
+tokens = math.min(capacity, tokens + math.max(0, now_ms - ts) * refill_per_ms)
+
+local allowed = 0
+local retry_after_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after_ms = math.ceil((1 - tokens) / refill_per_ms)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now_ms)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / refill_per_ms) + 1000)
+return {allowed, retry_after_ms}
+"""
+
+
+# Per-process mirror of the Redis buckets. A caller only keeps spending local
+# tokens on requests Redis admitted, so the local bucket is never emptier than
+# the global one and rejects, without a round trip, only callers that are over
+# the limit from this process alone.
+class LocalTokenBucket:
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, key: str, policy: RateLimitPolicy) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (float(policy.limit), now))
+            tokens = min(float(policy.limit), tokens + (now - updated_at) * policy.refill_per_second)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                self._buckets.move_to_end(key)
+                return (1 - tokens) / policy.refill_per_second
+            self._buckets[key] = (tokens - 1, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return 0.0
+
+    def refund(self, key: str, policy: RateLimitPolicy) -> None:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                tokens, updated_at = bucket
+                self._buckets[key] = (min(float(policy.limit), tokens + 1), updated_at)
+
+
+@lru_cache
+def get_local_token_bucket() -> LocalTokenBucket:
+    return LocalTokenBucket(max_keys=int(os.getenv("RATE_LIMIT_LOCAL_MAX_KEYS", "50000")))
+
+
+@lru_cache
+def _token_bucket_script():
+    return get_redis_client().register_script(TOKEN_BUCKET_SCRIPT)
+
 
+@lru_cache
+def _token_bucket_script_async():
+    return get_async_redis_client().register_script(TOKEN_BUCKET_SCRIPT)
 
-def enforce_rate_limit(*, scope: str, subject_id: int, limit: int, window_seconds: int) -> None:
-    key = f"ratelimit:{scope}:{subject_id}"
-    redis_client = get_redis_client()
+
+def _bucket_key(scope: str, subject_id: int) -> str:
+    # A prefix of its own: the old INCR limiter left string counters (some
+    # without an expiry) under ratelimit:{scope}:{id}, which HMGET rejects.
+    return f"ratelimit:tb:{scope}:{subject_id}"
+
+
+def enforce_rate_limit(*, scope: str, subject_id: int) -> None:
+    policy = RATE_LIMIT_POLICIES[scope]
+    key = _bucket_key(scope, subject_id)
+    local_bucket = get_local_token_bucket()
+    _check_local(local_bucket, scope, key, policy)
+
+    try:
+        allowed, retry_after_ms = _token_bucket_script()(keys=[key], args=_script_args(policy))
+    except RedisError:
+        local_bucket.refund(key, policy)
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Security service unavailable")
+
+    _check_global(local_bucket, scope, key, policy, allowed, retry_after_ms)
+
+
+async def enforce_rate_limit_async(*, scope: str, subject_id: int) -> None:
+    policy = RATE_LIMIT_POLICIES[scope]
+    key = _bucket_key(scope, subject_id)
+    local_bucket = get_local_token_bucket()
+    _check_local(local_bucket, scope, key, policy)
 
     try:
-        current = redis_client.incr(key)
-        if current == 1:
-            redis_client.expire(key, window_seconds)
+        allowed, retry_after_ms = await _token_bucket_script_async()(keys=[key], args=_script_args(policy))
     except RedisError:
+        local_bucket.refund(key, policy)
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Security service unavailable")
 
-    if current > limit:
-        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many requests")
+    _check_global(local_bucket, scope, key, policy, allowed, retry_after_ms)
+
+
+def _script_args(policy: RateLimitPolicy) -> list:
+    return [policy.limit, policy.refill_per_second / 1000.0]
+
+
+def _check_local(local_bucket: LocalTokenBucket, scope: str, key: str, policy: RateLimitPolicy) -> None:
+    retry_after_seconds = local_bucket.try_acquire(key, policy)
+    if retry_after_seconds > 0:
+        _raise_too_many_requests(scope, retry_after_seconds)
+
+
+def _check_global(
+    local_bucket: LocalTokenBucket, scope: str, key: str, policy: RateLimitPolicy, allowed: int, retry_after_ms: int
+) -> None:
+    if not allowed:
+        local_bucket.refund(key, policy)
+        _raise_too_many_requests(scope, retry_after_ms / 1000.0)
+
+
+def _raise_too_many_requests(scope: str, retry_after_seconds: float) -> None:
+    RATE_LIMIT_REJECTIONS.labels(scope).inc()
+    raise HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after_seconds)))},
+    )
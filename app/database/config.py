@@ -2,6 +2,7 @@ import os
 from functools import lru_cache
 
 from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
 
 
 load_dotenv()
@@ -13,3 +14,13 @@ def get_database_url() -> str:
     if not database_url:
         raise RuntimeError("DATABASE_URL environment variable is not set.")
     return database_url
+
+
+@lru_cache
+def get_async_database_url() -> str:
+    url = make_url(get_database_url()).set(drivername="postgresql+asyncpg")
+    # asyncpg names libpq's sslmode parameter "ssl".
+    sslmode = url.query.get("sslmode")
+    if sslmode is not None:
+        url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+    return url.render_as_string(hide_password=False)
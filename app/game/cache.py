@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from app.game.service import axial_disk
+
+WORLD_GRID_MAX_RADIUS = 8
+# Rough per-tile footprint of a cached world-grid payload: the tile dict, its
+# center dict and six boundary dicts, each holding two floats.
+WORLD_GRID_TILE_BYTES_ESTIMATE = 1600
+# The compact variant keeps four ints per tile, plus twelve more with boundaries.
+WORLD_GRID_COMPACT_TILE_BYTES_ESTIMATE = 160
+WORLD_GRID_COMPACT_BOUNDARY_BYTES_ESTIMATE = 450
+# Centers whose invalidation stamp is remembered; older stamps fold into one floor.
+WORLD_GRID_MAX_STAMPED_CENTERS = 65536
+
+# (center_q, center_r, radius, variant)
+CacheKey = tuple[int, int, int, str]
+
+
+# Claims invalidate entries directly, and claims on other workers arrive over
+# the tile event channel. The TTL bounds how long an entry can stay stale when
+# one of those messages is lost.
+class WorldGridCache:
+    def __init__(self, max_bytes: int, max_entries: int, ttl_seconds: float) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[CacheKey, tuple[dict, int, float]] = OrderedDict()
+        self._keys_by_center: dict[tuple[int, int], set[CacheKey]] = {}
+        self._lock = threading.Lock()
+        # Each invalidation stamps the centers it reaches with a fresh clock
+        # value, so a build only loses its result to claims near its own center.
+        self._clock = 0
+        self._stamps: OrderedDict[tuple[int, int], int] = OrderedDict()
+        self._stamp_floor = 0
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def generation(self, center_q: int, center_r: int) -> int:
+        with self._lock:
+            return self._stamps.get((center_q, center_r), self._stamp_floor)
+
+    def get(self, key: CacheKey) -> dict | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= now:
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: CacheKey, payload: dict, generation: int, size: int) -> None:
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            # A claim near this center committed while the payload was being built; it may be stale.
+            if generation != self._stamps.get((key[0], key[1]), self._stamp_floor):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (payload, size, time.monotonic() + self.ttl_seconds)
+            self._keys_by_center.setdefault((key[0], key[1]), set()).add(key)
+            self._bytes += size
+            while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def invalidate_cell(self, q: int, r: int) -> None:
+        with self._lock:
+            self._clock += 1
+            centers = axial_disk(q, r, WORLD_GRID_MAX_RADIUS)
+            for center in centers:
+                self._stamps[center] = self._clock
+                self._stamps.move_to_end(center)
+            while len(self._stamps) > WORLD_GRID_MAX_STAMPED_CENTERS:
+                _, stamp = self._stamps.popitem(last=False)
+                self._stamp_floor = max(self._stamp_floor, stamp)
+            if not self._entries:
+                return
+            for center_q, center_r in centers:
+                keys = self._keys_by_center.get((center_q, center_r))
+                if not keys:
+                    continue
+                distance = max(abs(q - center_q), abs(r - center_r), abs((q + r) - (center_q + center_r)))
+                for key in [key for key in keys if key[2] >= distance]:
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clock += 1
+            self._stamps.clear()
+            self._stamp_floor = self._clock
+            self._entries.clear()
+            self._keys_by_center.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes_estimate": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key: CacheKey) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        center = (key[0], key[1])
+        keys = self._keys_by_center.get(center)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_center[center]
+
+
+@lru_cache
+def get_world_grid_cache() -> WorldGridCache:
+    max_bytes = int(os.getenv("WORLD_GRID_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    max_entries = int(os.getenv("WORLD_GRID_CACHE_MAX_ENTRIES", "4096"))
+    ttl_seconds = float(os.getenv("WORLD_GRID_CACHE_TTL_SECONDS", "30"))
+    return WorldGridCache(max_bytes=max_bytes, max_entries=max_entries, ttl_seconds=ttl_seconds)
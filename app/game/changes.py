@@ -0,0 +1,101 @@
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import BigInteger, Text, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.database.session import SessionLocal
+from app.game.models import HexTile, TileChange
+
+MAX_DELTA_CHANGES = 500
+DEFAULT_RETENTION_HOURS = 72
+
+
+def append_tile_change(db: Session, tile: HexTile) -> dict:
+    change = TileChange(tile_id=tile.id, q=tile.q, r=tile.r, owner_id=tile.owner_id)
+    db.add(change)
+    db.flush()
+    return tile_change_event(change)
+
+
+def tile_change_event(change: TileChange) -> dict:
+    return {
+        "seq": change.seq,
+        "id": change.tile_id,
+        "q": change.q,
+        "r": change.r,
+        "owner_id": change.owner_id,
+    }
+
+
+def current_change_cursor(db: Session) -> int:
+    # Cursors are transaction ids rather than seqs: every transaction below the
+    # snapshot xmin has finished, so a change logged by one of them is already
+    # visible and none can appear behind a cursor later. Writers need no shared
+    # lock to keep this true; a long open transaction only holds the cursor back.
+    horizon = func.pg_snapshot_xmin(func.pg_current_snapshot())
+    return db.execute(select(cast(cast(horizon, Text), BigInteger))).scalar_one()
+
+
+def read_tile_changes(
+    db: Session, since: int, center_q: int, center_r: int, radius: int
+) -> tuple[list[TileChange] | None, int]:
+    cursor = current_change_cursor(db)
+    min_txid = db.query(func.min(TileChange.txid)).scalar()
+    if since > cursor or (min_txid is not None and since < min_txid):
+        return None, cursor
+    if min_txid is None:
+        return [], cursor
+
+    changes = (
+        db.query(TileChange)
+        .filter(TileChange.txid >= since, TileChange.txid < cursor)
+        .filter(TileChange.q.between(center_q - radius, center_q + radius))
+        .filter(TileChange.r.between(center_r - radius, center_r + radius))
+        .order_by(TileChange.seq.asc())
+        .limit(MAX_DELTA_CHANGES + 1)
+        .all()
+    )
+    if len(changes) > MAX_DELTA_CHANGES:
+        return None, cursor
+
+    latest_by_cell: dict[tuple[int, int], TileChange] = {}
+    for change in changes:
+        dq = change.q - center_q
+        dr = change.r - center_r
+        if max(abs(dq), abs(dr), abs(dq + dr)) <= radius:
+            latest_by_cell[(change.q, change.r)] = change
+    return sorted(latest_by_cell.values(), key=lambda change: change.seq), cursor
+
+
+def prune_tile_changes(db: Session, older_than: datetime) -> int:
+    # Pruning cuts at a transaction id so everything kept is newer than anything
+    # removed, and a cursor below the oldest kept entry can be told to resync.
+    # The newest entry is always kept so the log never looks empty to a client
+    # holding a recent cursor.
+    max_seq = db.query(func.max(TileChange.seq)).scalar()
+    if max_seq is None:
+        return 0
+    cutoff_txid = db.query(func.max(TileChange.txid)).filter(TileChange.changed_at < older_than).scalar()
+    if cutoff_txid is None:
+        return 0
+    return (
+        db.query(TileChange)
+        .filter(TileChange.txid <= cutoff_txid, TileChange.seq < max_seq)
+        .delete(synchronize_session=False)
+    )
+
+
+def main() -> None:
+    retention_hours = int(os.getenv("TILE_CHANGE_RETENTION_HOURS", str(DEFAULT_RETENTION_HOURS)))
+    db = SessionLocal()
+    try:
+        deleted = prune_tile_changes(db, datetime.utcnow() - timedelta(hours=retention_hours))
+        db.commit()
+        print(f"Pruned {deleted} tile changes.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
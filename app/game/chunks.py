@@ -0,0 +1,91 @@
+from sqlalchemy import and_, func, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.game.models import HexChunk, HexTile
+
+CHUNK_SIZE = 16
+MAX_CHUNKS_PER_REQUEST = 16
+
+ChunkKey = tuple[int, int]
+
+
+def chunk_of(q: int, r: int) -> ChunkKey:
+    return q // CHUNK_SIZE, r // CHUNK_SIZE
+
+
+def chunk_id(chunk_q: int, chunk_r: int) -> str:
+    return f"{chunk_q}:{chunk_r}"
+
+
+def parse_chunk_id(value: str) -> ChunkKey:
+    chunk_q, chunk_r = value.split(":")
+    return int(chunk_q), int(chunk_r)
+
+
+def chunk_bounds(chunk_q: int, chunk_r: int) -> tuple[int, int, int, int]:
+    q_min = chunk_q * CHUNK_SIZE
+    r_min = chunk_r * CHUNK_SIZE
+    return q_min, q_min + CHUNK_SIZE - 1, r_min, r_min + CHUNK_SIZE - 1
+
+
+def chunks_covering_disk(center_q: int, center_r: int, radius: int) -> list[ChunkKey]:
+    min_chunk_q, min_chunk_r = chunk_of(center_q - radius, center_r - radius)
+    max_chunk_q, max_chunk_r = chunk_of(center_q + radius, center_r + radius)
+    return [
+        (chunk_q, chunk_r)
+        for chunk_q in range(min_chunk_q, max_chunk_q + 1)
+        for chunk_r in range(min_chunk_r, max_chunk_r + 1)
+    ]
+
+
+def bump_chunk_version(db: Session, q: int, r: int) -> None:
+    chunk_q, chunk_r = chunk_of(q, r)
+    statement = insert(HexChunk).values(chunk_q=chunk_q, chunk_r=chunk_r, version=1)
+    statement = statement.on_conflict_do_update(
+        index_elements=[HexChunk.chunk_q, HexChunk.chunk_r],
+        set_={"version": HexChunk.version + 1},
+    )
+    db.execute(statement)
+
+
+def total_chunk_version(db: Session) -> int:
+    # Every committed claim or tile insert bumps some chunk by one, so the sum
+    # changes with each commit regardless of the order transactions finish in.
+    return db.execute(select(func.coalesce(func.sum(HexChunk.version), 0))).scalar_one()
+
+
+def get_chunk_versions(db: Session, chunks: list[ChunkKey]) -> dict[ChunkKey, int]:
+    if not chunks:
+        return {}
+
+    rows = (
+        db.query(HexChunk.chunk_q, HexChunk.chunk_r, HexChunk.version)
+        .filter(tuple_(HexChunk.chunk_q, HexChunk.chunk_r).in_(chunks))
+        .all()
+    )
+    versions = {chunk: 0 for chunk in chunks}
+    for chunk_q, chunk_r, version in rows:
+        versions[(chunk_q, chunk_r)] = version
+    return versions
+
+
+def load_chunk_tiles(db: Session, chunks: list[ChunkKey]) -> dict[ChunkKey, list[dict]]:
+    tiles_by_chunk: dict[ChunkKey, list[dict]] = {chunk: [] for chunk in chunks}
+    if not chunks:
+        return tiles_by_chunk
+
+    ranges = []
+    for chunk_q, chunk_r in chunks:
+        q_min, q_max, r_min, r_max = chunk_bounds(chunk_q, chunk_r)
+        ranges.append(and_(HexTile.q.between(q_min, q_max), HexTile.r.between(r_min, r_max)))
+
+    rows = (
+        db.query(HexTile.id, HexTile.q, HexTile.r, HexTile.owner_id)
+        .filter(or_(*ranges))
+        .order_by(HexTile.r.asc(), HexTile.q.asc())
+        .all()
+    )
+    for tile_id, q, r, owner_id in rows:
+        tiles_by_chunk[chunk_of(q, r)].append({"id": tile_id, "q": q, "r": r, "owner_id": owner_id})
+    return tiles_by_chunk
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from functools import lru_cache
+
+from redis.exceptions import RedisError
+
+from app.core.redis_client import get_async_redis_client
+from app.game.cache import get_world_grid_cache
+from app.game.chunks import ChunkKey, chunk_of, chunks_covering_disk
+
+TILE_EVENTS_CHANNEL = "tiles:changes"
+SUBSCRIPTION_QUEUE_SIZE = 64
+LISTENER_RECONNECT_SECONDS = 1.0
+# Seqs this worker published and has not yet seen echoed back by the channel.
+PUBLISHED_SEQS_MAX = 4096
+
+logger = logging.getLogger("steprealm.game.events")
+
+
+class TileSubscription:
+    def __init__(self, center_q: int, center_r: int, radius: int) -> None:
+        self.center_q = center_q
+        self.center_r = center_r
+        self.radius = radius
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+        self.overflowed = False
+
+    def chunks(self) -> list[ChunkKey]:
+        return chunks_covering_disk(self.center_q, self.center_r, self.radius)
+
+    def covers(self, q: int, r: int) -> bool:
+        dq = q - self.center_q
+        dr = r - self.center_r
+        return max(abs(dq), abs(dr), abs(dq + dr)) <= self.radius
+
+    def offer(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class TileEventHub:
+    def __init__(self) -> None:
+        self._by_chunk: dict[ChunkKey, set[TileSubscription]] = {}
+        self._subscriptions: set[TileSubscription] = set()
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, subscription: TileSubscription) -> None:
+        self._subscriptions.add(subscription)
+        for chunk in subscription.chunks():
+            self._by_chunk.setdefault(chunk, set()).add(subscription)
+
+    def unsubscribe(self, subscription: TileSubscription) -> None:
+        self._subscriptions.discard(subscription)
+        for chunk in subscription.chunks():
+            subscribers = self._by_chunk.get(chunk)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._by_chunk[chunk]
+
+    def move(self, subscription: TileSubscription, center_q: int, center_r: int, radius: int) -> None:
+        self.unsubscribe(subscription)
+        subscription.center_q = center_q
+        subscription.center_r = center_r
+        subscription.radius = radius
+        self.subscribe(subscription)
+
+    def dispatch(self, event: dict) -> None:
+        q = event["q"]
+        r = event["r"]
+        message = {"type": "tile", **event}
+        for subscription in self._by_chunk.get(chunk_of(q, r), ()):
+            if subscription.covers(q, r):
+                subscription.offer(message)
+
+    def broadcast_resync(self) -> None:
+        for subscription in self._subscriptions:
+            subscription.overflowed = True
+            subscription.offer({"type": "resync"})
+
+
+class InProcessTileEventBroker:
+    def __init__(self) -> None:
+        self.hub = TileEventHub()
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, event: dict) -> None:
+        # The publisher has already invalidated its cache for the claim.
+        self.hub.dispatch(event)
+
+
+class RedisTileEventBroker:
+    def __init__(self) -> None:
+        self.hub = TileEventHub()
+        self._listener: asyncio.Task | None = None
+        self._published: OrderedDict[int, None] = OrderedDict()
+
+    async def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        try:
+            await self._listener
+        except asyncio.CancelledError:
+            pass
+        self._listener = None
+
+    async def publish(self, event: dict) -> None:
+        self._published[event["seq"]] = None
+        while len(self._published) > PUBLISHED_SEQS_MAX:
+            self._published.popitem(last=False)
+        try:
+            await get_async_redis_client().publish(TILE_EVENTS_CHANNEL, json.dumps(event))
+        except RedisError:
+            logger.exception("tile_event_publish_failed", extra={"q": event["q"], "r": event["r"]})
+
+    async def _listen(self) -> None:
+        connected_before = False
+        while True:
+            pubsub = get_async_redis_client().pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(TILE_EVENTS_CHANNEL)
+                if connected_before:
+                    # Anything published while we were disconnected is lost; drop
+                    # cached world grids that may predate it and make clients catch up.
+                    get_world_grid_cache().clear()
+                    self.hub.broadcast_resync()
+                connected_before = True
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        event = json.loads(message["data"])
+                        if event.get("seq") in self._published:
+                            # Our own claim, already applied to the cache after its commit.
+                            del self._published[event["seq"]]
+                            self.hub.dispatch(event)
+                        else:
+                            _deliver(self.hub, event)
+            except (RedisError, OSError, ValueError):
+                logger.exception("tile_event_listener_failed")
+                await asyncio.sleep(LISTENER_RECONNECT_SECONDS)
+            finally:
+                await pubsub.aclose()
+
+
+def _deliver(hub: TileEventHub, event: dict) -> None:
+    # Claims made by other workers also invalidate this process's world-grid cache.
+    get_world_grid_cache().invalidate_cell(event["q"], event["r"])
+    hub.dispatch(event)
+
+
+@lru_cache
+def get_tile_event_broker() -> InProcessTileEventBroker | RedisTileEventBroker:
+    if os.getenv("TILE_EVENTS_BROKER", "redis") == "memory":
+        return InProcessTileEventBroker()
+    return RedisTileEventBroker()
@@ -1,5 +1,6 @@
 from app.database.session import SessionLocal
-from app.game.models import HexTile
+from app.game.chunks import chunk_of
+from app.game.models import HexChunk, HexTile
 
 TARGET_TILE_COUNT = 800
 BASE_RADIUS = 16
@@ -36,8 +37,10 @@ def main() -> None:
 
         coords = generate_target_coords()
         tiles = [HexTile(q=q, r=r) for q, r in coords]
+        chunks = sorted({chunk_of(q, r) for q, r in coords})
 
         db.bulk_save_objects(tiles)
+        db.bulk_save_objects([HexChunk(chunk_q=chunk_q, chunk_r=chunk_r, version=1) for chunk_q, chunk_r in chunks])
         db.commit()
         print(f"Inserted {len(tiles)} hex tiles.")
     finally:
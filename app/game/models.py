@@ -1,4 +1,6 @@
-from sqlalchemy import CheckConstraint, ForeignKey, Index, Integer, UniqueConstraint
+from datetime import datetime
+
+from sqlalchemy import BigInteger, CheckConstraint, DateTime, ForeignKey, Index, Integer, UniqueConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database.base import Base
@@ -9,6 +11,7 @@ class HexTile(Base):
     __table_args__ = (
         UniqueConstraint("q", "r", name="uq_hex_tiles_q_r"),
         Index("ix_hex_tiles_q_r", "q", "r"),
+        Index("ix_hex_tiles_r_q", "r", "q"),
         CheckConstraint("defense_level >= 1", name="ck_hex_tiles_defense_level_min"),
     )
 
@@ -17,3 +20,28 @@ class HexTile(Base):
     r: Mapped[int] = mapped_column(Integer, nullable=False)
     owner_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True, index=True)
     defense_level: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
+
+class HexChunk(Base):
+    __tablename__ = "hex_chunks"
+    __table_args__ = (
+        CheckConstraint("version >= 1", name="ck_hex_chunks_version_min"),
+    )
+
+    chunk_q: Mapped[int] = mapped_column(Integer, primary_key=True)
+    chunk_r: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=1)
+
+
+class TileChange(Base):
+    __tablename__ = "tile_changes"
+
+    seq: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    tile_id: Mapped[int] = mapped_column(ForeignKey("hex_tiles.id"), nullable=False)
+    q: Mapped[int] = mapped_column(Integer, nullable=False)
+    r: Mapped[int] = mapped_column(Integer, nullable=False)
+    owner_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
+    changed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    txid: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, server_default=text("pg_current_xact_id()::text::bigint"), index=True
+    )
@@ -0,0 +1,94 @@
+import logging
+
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from app.core.redis_client import get_async_redis_client, get_redis_client
+from app.database.session import SessionLocal
+from app.game.chunks import chunk_id, chunk_of
+from app.game.models import HexTile
+from app.game.service import AXIAL_DIRECTIONS
+
+# Cell owners are mirrored into one Redis hash per chunk, field "q:r" -> owner id.
+# hex_tiles stays authoritative: the index is written only after a claim commits
+# and may lag, so a miss falls back to the database. A hit can be trusted because
+# an owned tile never changes hands.
+OWNERSHIP_KEY_PREFIX = "tiles:owners"
+OWNERSHIP_REBUILD_BATCH_SIZE = 5000
+
+logger = logging.getLogger("steprealm.game.ownership")
+
+
+def ownership_key(q: int, r: int) -> str:
+    return f"{OWNERSHIP_KEY_PREFIX}:{chunk_id(*chunk_of(q, r))}"
+
+
+def ownership_field(q: int, r: int) -> str:
+    return f"{q}:{r}"
+
+
+async def index_has_adjacent_owner(owner_id: int, q: int, r: int) -> bool:
+    try:
+        async with get_async_redis_client().pipeline(transaction=False) as pipe:
+            for dq, dr in AXIAL_DIRECTIONS:
+                pipe.hget(ownership_key(q + dq, r + dr), ownership_field(q + dq, r + dr))
+            owners = await pipe.execute()
+    except RedisError:
+        logger.exception("ownership_index_read_failed", extra={"q": q, "r": r})
+        return False
+    return str(owner_id) in owners
+
+
+async def record_tile_owners(changes: list[dict]) -> None:
+    try:
+        async with get_async_redis_client().pipeline(transaction=False) as pipe:
+            for change in changes:
+                q, r = change["q"], change["r"]
+                pipe.hset(ownership_key(q, r), ownership_field(q, r), change["owner_id"])
+            await pipe.execute()
+    except RedisError:
+        logger.exception("ownership_index_write_failed", extra={"tiles": len(changes)})
+
+
+def rebuild_ownership_index() -> int:
+    redis_client = get_redis_client()
+    stale_keys = list(redis_client.scan_iter(match=f"{OWNERSHIP_KEY_PREFIX}:*", count=1000))
+    for start in range(0, len(stale_keys), 1000):
+        redis_client.delete(*stale_keys[start : start + 1000])
+
+    db = SessionLocal()
+    indexed = 0
+    last_id = 0
+    try:
+        while True:
+            rows = db.execute(
+                select(HexTile.id, HexTile.q, HexTile.r, HexTile.owner_id)
+                .where(HexTile.owner_id.is_not(None), HexTile.id > last_id)
+                .order_by(HexTile.id)
+                .limit(OWNERSHIP_REBUILD_BATCH_SIZE)
+            ).all()
+            db.rollback()
+            if not rows:
+                return indexed
+
+            by_key: dict[str, dict[str, int]] = {}
+            for _, q, r, owner_id in rows:
+                by_key.setdefault(ownership_key(q, r), {})[ownership_field(q, r)] = owner_id
+            pipe = redis_client.pipeline(transaction=False)
+            for key, mapping in by_key.items():
+                pipe.hset(key, mapping=mapping)
+            pipe.execute()
+
+            indexed += len(rows)
+            last_id = rows[-1].id
+    finally:
+        db.close()
+
+
+def main() -> None:
+    indexed = rebuild_ownership_index()
+    print(f"Indexed {indexed} owned tiles.")
+
+
+if __name__ == "__main__":
+    main()
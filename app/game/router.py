@@ -1,78 +1,267 @@
+import asyncio
+import json
 import logging
-
-from fastapi import APIRouter, Depends, HTTPException, status
-from redis.exceptions import RedisError
-from sqlalchemy import func
+from collections.abc import Iterator
+
+from fastapi import APIRouter, Depends, Header, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import Response, StreamingResponse
+import orjson
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import tuple_
 
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_current_user_async
 from app.auth.models import User
+from app.auth.principals import Principal
+from app.auth.security import decode_access_token
 from app.college.models import College
-from app.core.redis_client import get_redis_client
-from app.core.security import enforce_rate_limit
-from app.database.session import get_db
+from app.core.etag import etag_matches, make_etag, not_modified
+from app.core.metrics import TILE_CLAIMS
+from app.core.security import enforce_rate_limit_async
+from app.database.session import SessionLocal, get_async_db, get_db
+from app.game.cache import (
+    WORLD_GRID_COMPACT_BOUNDARY_BYTES_ESTIMATE,
+    WORLD_GRID_COMPACT_TILE_BYTES_ESTIMATE,
+    WORLD_GRID_MAX_RADIUS,
+    WORLD_GRID_TILE_BYTES_ESTIMATE,
+    CacheKey,
+    get_world_grid_cache,
+)
+from app.game.changes import append_tile_change, current_change_cursor, read_tile_changes, tile_change_event
+from app.game.chunks import (
+    CHUNK_SIZE,
+    MAX_CHUNKS_PER_REQUEST,
+    bump_chunk_version,
+    chunk_id,
+    chunk_of,
+    chunks_covering_disk,
+    get_chunk_versions,
+    load_chunk_tiles,
+    parse_chunk_id,
+    total_chunk_version,
+)
+from app.game.events import TileSubscription, get_tile_event_broker
 from app.game.models import HexTile
-from app.game.schemas import ClaimByLocationRequest, ClaimTileRequest
+from app.game.ownership import index_has_adjacent_owner, record_tile_owners
+from app.game.schemas import ClaimBatchRequest, ClaimByLocationRequest, ClaimTileRequest, ClaimTraceRequest
 from app.game.service import (
+    AXIAL_DIRECTIONS,
     CLAIM_COST,
     WALK_CAPTURE_DISTANCE_METERS,
-    axial_disk,
-    axial_to_boundary,
-    axial_to_lat_lng,
+    axial_disk_batch,
+    axial_to_boundary_batch,
+    axial_to_lat_lng_batch,
+    batch_to_list,
+    fixed_point_pairs_batch,
     has_adjacent_owned_tile,
     lat_lng_to_axial,
-    user_owns_any_tile,
 )
-from app.leaderboard.constants import TILES_OWNED_LEADERBOARD_KEY
+from app.game.snapshot import (
+    SNAPSHOT_MEDIA_TYPE,
+    SNAPSHOT_UNOWNED,
+    encode_snapshot_header,
+    encode_snapshot_records,
+)
+from app.game.trace import decode_polyline, trace_cells, trace_distance_meters
+from app.leaderboard.service import record_claim_scores
+from app.mana.service import apply_passive_regen
 
 router = APIRouter()
 logger = logging.getLogger("steprealm.game")
 
+GRID_PAGE_DEFAULT_LIMIT = 1000
+GRID_PAGE_MAX_LIMIT = 5000
+GRID_STREAM_BATCH_SIZE = 1000
+GRID_SNAPSHOT_BATCH_SIZE = 10000
+WORLD_GRID_COMPACT_MEDIA_TYPE = "application/vnd.steprealm.world-grid.compact+json"
+WORLD_GRID_COORDINATE_SCALE = 1_000_000
+WORLD_GRID_WS_AUTH_TIMEOUT_SECONDS = 10
+
 
 @router.get("/grid")
-def get_grid(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> dict:
-    tiles = db.query(HexTile).order_by(HexTile.r.asc(), HexTile.q.asc()).all()
+def get_grid(
+    response: Response,
+    after: str | None = None,
+    limit: int = GRID_PAGE_DEFAULT_LIMIT,
+    format: str = "json",
+    if_none_match: str | None = Header(default=None),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    if limit < 1 or limit > GRID_PAGE_MAX_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit must be between 1 and {GRID_PAGE_MAX_LIMIT}",
+        )
+    if format not in ("json", "ndjson", "binary"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="format must be json, ndjson or binary")
+    cursor = _parse_grid_cursor(after)
+
+    # The version is read before any tile, so a claim racing this request can
+    # only make the body newer than its ETag, never older.
+    etag = make_etag(total_chunk_version(db), current_user.id)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    headers = {"ETag": etag}
+
+    # The streaming bodies outlive this request's dependencies, so they open their own session.
+    if format == "ndjson":
+        return StreamingResponse(_stream_grid_ndjson(cursor), media_type="application/x-ndjson", headers=headers)
+    if format == "binary":
+        return StreamingResponse(_stream_grid_snapshot(cursor), media_type=SNAPSHOT_MEDIA_TYPE, headers=headers)
+
+    rows = _grid_rows(db, cursor, limit + 1)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        _, last_q, last_r, _ = rows[-1]
+        next_cursor = f"{last_r}:{last_q}"
+
+    response.headers.update(headers)
     return {
         "current_user_id": current_user.id,
         "tiles": [
             {
-                "id": tile.id,
-                "q": tile.q,
-                "r": tile.r,
-                "owner_id": tile.owner_id,
+                "id": tile_id,
+                "q": q,
+                "r": r,
+                "owner_id": owner_id,
+            }
+            for tile_id, q, r, owner_id in rows
+        ],
+        "next_cursor": next_cursor,
+    }
+
+
+def _parse_grid_cursor(after: str | None) -> tuple[int, int] | None:
+    if after is None:
+        return None
+    try:
+        r, q = after.split(":")
+        return int(r), int(q)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="after must be formatted as r:q")
+
+
+def _grid_rows(
+    db: Session, cursor: tuple[int, int] | None, limit: int, owner_column=HexTile.owner_id
+) -> list[tuple[int, int, int, int | None]]:
+    query = db.query(HexTile.id, HexTile.q, HexTile.r, owner_column)
+    if cursor is not None:
+        query = query.filter(tuple_(HexTile.r, HexTile.q) > tuple_(*cursor))
+    return [tuple(row) for row in query.order_by(HexTile.r.asc(), HexTile.q.asc()).limit(limit)]
+
+
+def _stream_grid_ndjson(cursor: tuple[int, int] | None) -> Iterator[bytes]:
+    db = SessionLocal()
+    try:
+        while True:
+            rows = _grid_rows(db, cursor, GRID_STREAM_BATCH_SIZE)
+            if not rows:
+                return
+            yield "".join(
+                json.dumps({"id": tile_id, "q": q, "r": r, "owner_id": owner_id}) + "\n"
+                for tile_id, q, r, owner_id in rows
+            ).encode()
+            _, last_q, last_r, _ = rows[-1]
+            cursor = (last_r, last_q)
+            # End the read transaction between batches so a slow client never pins a snapshot.
+            db.rollback()
+    finally:
+        db.close()
+
+
+def _stream_grid_snapshot(cursor: tuple[int, int] | None) -> Iterator[bytes]:
+    yield encode_snapshot_header()
+    owner_column = func.coalesce(HexTile.owner_id, SNAPSHOT_UNOWNED)
+    db = SessionLocal()
+    try:
+        while True:
+            rows = _grid_rows(db, cursor, GRID_SNAPSHOT_BATCH_SIZE, owner_column)
+            if not rows:
+                return
+            yield encode_snapshot_records(rows)
+            _, last_q, last_r, _ = rows[-1]
+            cursor = (last_r, last_q)
+            db.rollback()
+    finally:
+        db.close()
+
+
+@router.get("/chunks")
+def get_chunks(ids: str, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)) -> dict:
+    known_versions: dict[tuple[int, int], int | None] = {}
+    try:
+        for item in ids.split(","):
+            key, _, known_version = item.partition("@")
+            known_versions[parse_chunk_id(key)] = int(known_version) if known_version else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of chunk_q:chunk_r[@version]",
+        )
+    if len(known_versions) > MAX_CHUNKS_PER_REQUEST:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_CHUNKS_PER_REQUEST} chunks can be requested at once",
+        )
+
+    # Versions are read before tiles so a concurrent claim can only make the
+    # returned version older than the data, never newer.
+    versions = get_chunk_versions(db, list(known_versions))
+    stale_chunks = [chunk for chunk, version in versions.items() if version != known_versions[chunk]]
+    tiles_by_chunk = load_chunk_tiles(db, stale_chunks)
+
+    return {
+        "current_user_id": current_user.id,
+        "chunk_size": CHUNK_SIZE,
+        "chunks": [
+            {
+                "id": chunk_id(*chunk),
+                "version": version,
+                "unchanged": chunk not in tiles_by_chunk,
+                "tiles": tiles_by_chunk.get(chunk, []),
             }
-            for tile in tiles
+            for chunk, version in versions.items()
         ],
     }
 
 
 @router.post("/claim")
-def claim_tile(payload: ClaimTileRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> dict:
-    enforce_rate_limit(scope="claim_tile", subject_id=current_user.id, limit=10, window_seconds=10)
+async def claim_tile(
+    payload: ClaimTileRequest,
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> dict:
+    await enforce_rate_limit_async(scope="claim_tile", subject_id=current_user.id)
     logger.info(
         "tile_claim_attempt",
         extra={"user_id": current_user.id, "q": payload.q, "r": payload.r},
     )
-    total_tiles_owned = 0
-    claimed = False
+    # Resolved before any row is locked; the transaction only queries the
+    # database for adjacency when the index has no answer.
+    adjacent_owned = await index_has_adjacent_owner(current_user.id, payload.q, payload.r)
+    change = None
     try:
-        user, tile, total_tiles_owned, claimed = _claim_tile_tx(
-            db=db,
+        user, tile, change, college_tiles = await db.run_sync(
+            _claim_tile_tx,
             user_id=current_user.id,
             q=payload.q,
             r=payload.r,
             create_if_missing=False,
+            adjacent_owned=adjacent_owned,
         )
-        db.commit()
+        await db.commit()
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise
 
-    db.refresh(user)
-    db.refresh(tile)
-    if claimed:
-        _update_leaderboard(user.id, total_tiles_owned)
+    await db.refresh(user)
+    await db.refresh(tile)
+    if change is not None:
+        await _after_claim_commit(user, college_tiles, [change])
 
     logger.info(
         "tile_claim_success",
@@ -88,57 +277,340 @@ def claim_tile(payload: ClaimTileRequest, current_user: User = Depends(get_curre
     }
 
 
+@router.post("/claim-batch")
+async def claim_tile_batch(
+    payload: ClaimBatchRequest,
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> dict:
+    await enforce_rate_limit_async(scope="claim_batch", subject_id=current_user.id)
+    cells = [(tile.q, tile.r) for tile in payload.tiles]
+    logger.info("tile_claim_batch_attempt", extra={"user_id": current_user.id, "tiles": len(cells)})
+    try:
+        user, results, changes, college_tiles = await db.run_sync(_claim_tiles_batch_tx, user_id=current_user.id, cells=cells)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    if changes:
+        await _after_claim_commit(user, college_tiles, changes)
+
+    logger.info(
+        "tile_claim_batch_success",
+        extra={"user_id": user.id, "tiles": len(cells), "claimed": len(changes), "mana": user.mana},
+    )
+
+    return {
+        "results": results,
+        "claimed": len(changes),
+        "tiles_owned": user.tiles_owned,
+        "mana": user.mana,
+    }
+
+
+@router.post("/claim-trace")
+async def claim_trace(
+    payload: ClaimTraceRequest,
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> dict:
+    await enforce_rate_limit_async(scope="claim_trace", subject_id=current_user.id)
+    try:
+        latitudes, longitudes = decode_polyline(payload.polyline)
+        cells = trace_cells(latitudes, longitudes)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    distance_m = trace_distance_meters(latitudes, longitudes)
+    if distance_m < WALK_CAPTURE_DISTANCE_METERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Walk at least {int(WALK_CAPTURE_DISTANCE_METERS)} meters before claiming",
+        )
+
+    logger.info(
+        "tile_claim_trace_attempt",
+        extra={"user_id": current_user.id, "points": len(latitudes), "cells": len(cells), "distance_m": distance_m},
+    )
+    try:
+        user, results, changes, college_tiles = await db.run_sync(
+            _claim_tiles_batch_tx, user_id=current_user.id, cells=cells, create_if_missing=True
+        )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    if changes:
+        await _after_claim_commit(user, college_tiles, changes)
+
+    logger.info(
+        "tile_claim_trace_success",
+        extra={"user_id": user.id, "cells": len(cells), "claimed": len(changes), "mana": user.mana},
+    )
+
+    return {
+        "distance_m": round(distance_m, 1),
+        "results": results,
+        "claimed": len(changes),
+        "tiles_owned": user.tiles_owned,
+        "mana": user.mana,
+    }
+
+
 @router.get("/world-grid")
-def get_world_grid(
+async def get_world_grid(
+    response: Response,
+    latitude: float,
+    longitude: float,
+    radius: int = 3,
+    format: str | None = None,
+    boundaries: bool = False,
+    accept: str | None = Header(default=None),
+    if_none_match: str | None = Header(default=None),
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> dict:
+    if radius < 1 or radius > WORLD_GRID_MAX_RADIUS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="radius must be between 1 and 8")
+    if format not in (None, "json", "compact"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="format must be json or compact")
+    compact = format == "compact" or (format is None and WORLD_GRID_COMPACT_MEDIA_TYPE in (accept or ""))
+
+    center_q, center_r = lat_lng_to_axial(latitude, longitude)
+    cache = get_world_grid_cache()
+    variant = ("compact+boundaries" if boundaries else "compact") if compact else "json"
+    cache_key = (center_q, center_r, radius, variant)
+    generation = cache.generation(center_q, center_r)
+    cached = cache.get(cache_key)
+    # The ETag follows the versions of the chunks under the disk, so claims
+    # elsewhere do not invalidate it. It is weak because the body also carries
+    # the global change cursor, which moves with every transaction; an older cursor
+    # still replays correctly, so a 304 is safe.
+    region_version = cached["region_version"] if cached else await _world_grid_region_version(db, cache_key)
+    etag = make_etag(region_version, current_user.id, weak=True)
+    # The representation can be picked by Accept, so shared caches must key on it.
+    headers = {"ETag": etag, "Vary": "Accept"}
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, headers)
+
+    if cached is None:
+        # The cursor is read before the tiles so a change racing this read is
+        # replayed by the next delta sync instead of being skipped.
+        cursor = await db.run_sync(current_change_cursor)
+        if compact:
+            grid = await _build_world_grid_compact(db, center_q, center_r, radius, boundaries)
+            cached = {"region_version": region_version, "cursor": cursor, "grid": grid}
+            tile_bytes = WORLD_GRID_COMPACT_TILE_BYTES_ESTIMATE
+            if boundaries:
+                tile_bytes += WORLD_GRID_COMPACT_BOUNDARY_BYTES_ESTIMATE
+            cache.put(cache_key, cached, generation, len(grid["ids"]) * tile_bytes)
+        else:
+            tiles = await _build_world_grid_tiles(db, center_q, center_r, radius)
+            cached = {"region_version": region_version, "cursor": cursor, "tiles": tiles}
+            cache.put(cache_key, cached, generation, len(tiles) * WORLD_GRID_TILE_BYTES_ESTIMATE)
+
+    if compact:
+        return Response(
+            content=orjson.dumps(
+                {
+                    "format": "compact",
+                    "current_user_id": current_user.id,
+                    "center": {"q": center_q, "r": center_r},
+                    "radius": radius,
+                    "cursor": cached["cursor"],
+                    **cached["grid"],
+                }
+            ),
+            media_type=WORLD_GRID_COMPACT_MEDIA_TYPE,
+            headers=headers,
+        )
+
+    response.headers.update(headers)
+    return {
+        "current_user_id": current_user.id,
+        "center": {"q": center_q, "r": center_r},
+        "cursor": cached["cursor"],
+        "tiles": cached["tiles"],
+    }
+
+
+@router.get("/world-grid/changes")
+def get_world_grid_changes(
     latitude: float,
     longitude: float,
+    since: int,
     radius: int = 3,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> dict:
-    if radius < 1 or radius > 8:
+    if radius < 1 or radius > WORLD_GRID_MAX_RADIUS:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="radius must be between 1 and 8")
+    if since < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since must not be negative")
 
     center_q, center_r = lat_lng_to_axial(latitude, longitude)
-    coords = axial_disk(center_q, center_r, radius)
+    changes, cursor = read_tile_changes(db, since, center_q, center_r, radius)
 
-    existing_tiles = (
-        db.query(HexTile)
-        .filter(tuple_(HexTile.q, HexTile.r).in_(coords))
-        .all()
-    )
-    existing_map = {(tile.q, tile.r): tile for tile in existing_tiles}
+    return {
+        "current_user_id": current_user.id,
+        "center": {"q": center_q, "r": center_r},
+        "cursor": cursor,
+        "resync": changes is None,
+        "changes": [tile_change_event(change) for change in changes or []],
+    }
+
+
+@router.websocket("/world-grid/ws")
+async def world_grid_events(
+    websocket: WebSocket,
+    latitude: float,
+    longitude: float,
+    radius: int = 3,
+) -> None:
+    if radius < 1 or radius > WORLD_GRID_MAX_RADIUS:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    # The token comes in the first message rather than the query string, which
+    # ends up in access logs.
+    try:
+        message = await asyncio.wait_for(_receive_ws_message(websocket), timeout=WORLD_GRID_WS_AUTH_TIMEOUT_SECONDS)
+        token = message["token"]
+        if not isinstance(token, str):
+            raise TypeError("token must be a string")
+        user_id = int(decode_access_token(token).get("sub"))
+    except WebSocketDisconnect:
+        return
+    except (asyncio.TimeoutError, KeyError, TypeError, ValueError):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    hub = get_tile_event_broker().hub
+    center_q, center_r = lat_lng_to_axial(latitude, longitude)
+    subscription = TileSubscription(center_q, center_r, radius)
+    hub.subscribe(subscription)
+    logger.info("tile_events_subscribed", extra={"user_id": user_id, "q": center_q, "r": center_r})
+
+    # All writes to the socket go through the subscription queue so only the sender task sends.
+    sender = asyncio.create_task(_send_tile_events(websocket, subscription))
+    try:
+        while True:
+            try:
+                message = await _receive_ws_message(websocket)
+            except (KeyError, ValueError):
+                subscription.offer({"type": "error", "detail": "messages must be JSON objects"})
+                continue
+            try:
+                radius = int(message.get("radius", subscription.radius))
+                center_q, center_r = lat_lng_to_axial(float(message["latitude"]), float(message["longitude"]))
+            except (KeyError, TypeError, ValueError):
+                subscription.offer({"type": "error", "detail": "latitude and longitude are required"})
+                continue
+            if radius < 1 or radius > WORLD_GRID_MAX_RADIUS:
+                subscription.offer({"type": "error", "detail": "radius must be between 1 and 8"})
+                continue
+            hub.move(subscription, center_q, center_r, radius)
+            subscription.offer({"type": "moved", "center": {"q": center_q, "r": center_r}})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        hub.unsubscribe(subscription)
+
+
+async def _receive_ws_message(websocket: WebSocket) -> dict:
+    message = json.loads(await websocket.receive_text())
+    if not isinstance(message, dict):
+        raise ValueError("Expected a JSON object")
+    return message
+
+
+async def _send_tile_events(websocket: WebSocket, subscription: TileSubscription) -> None:
+    while True:
+        event = await subscription.queue.get()
+        if subscription.overflowed:
+            # The client fell behind and events were dropped; it has to catch up with a delta sync.
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()
+            subscription.overflowed = False
+            await websocket.send_json({"type": "resync"})
+            continue
+        await websocket.send_json(event)
+
+
+@router.get("/world-grid/cache-stats")
+def get_world_grid_cache_stats(current_user: Principal = Depends(get_current_user)) -> dict:
+    return get_world_grid_cache().stats()
+
+
+async def _world_grid_region_version(db: AsyncSession, cache_key: CacheKey) -> str:
+    center_q, center_r, radius, variant = cache_key
+    versions = await db.run_sync(get_chunk_versions, chunks_covering_disk(center_q, center_r, radius))
+    return make_etag(cache_key, sorted(versions.items()))
+
+
+async def _build_world_grid_tiles(db: AsyncSession, center_q: int, center_r: int, radius: int) -> list[dict]:
+    disk_q, disk_r = axial_disk_batch(center_q, center_r, radius)
+    coords = list(zip(batch_to_list(disk_q), batch_to_list(disk_r)))
+    existing_map = await _load_disk_tiles(db, coords)
 
     tiles_payload: list[dict] = []
-    for q, r in coords:
-        tile = existing_map.get((q, r))
-        center_lat, center_lng = axial_to_lat_lng(q, r)
-        boundary = axial_to_boundary(q, r)
+    for (q, r), (center, boundary) in zip(coords, _tile_geometry(disk_q, disk_r)):
+        tile_id, owner_id = existing_map.get((q, r), (None, None))
         tiles_payload.append(
             {
-                "id": tile.id if tile else None,
+                "id": tile_id,
                 "q": q,
                 "r": r,
-                "owner_id": tile.owner_id if tile else None,
-                "center": {"latitude": center_lat, "longitude": center_lng},
-                "boundary": [{"latitude": lat, "longitude": lng} for lat, lng in boundary],
+                "owner_id": owner_id,
+                "center": center,
+                "boundary": boundary,
             }
         )
+    return tiles_payload
 
-    return {
-        "current_user_id": current_user.id,
-        "center": {"q": center_q, "r": center_r},
-        "tiles": tiles_payload,
+
+async def _build_world_grid_compact(
+    db: AsyncSession, center_q: int, center_r: int, radius: int, include_boundaries: bool
+) -> dict:
+    # Cells are listed in axial_disk order (dq ascending, then dr ascending), so
+    # clients rebuild every (q, r) from center and radius. Coordinates are
+    # interleaved [lat, lng, ...] pairs in millionths of a degree.
+    disk_q, disk_r = axial_disk_batch(center_q, center_r, radius)
+    coords = list(zip(batch_to_list(disk_q), batch_to_list(disk_r)))
+    existing_map = await _load_disk_tiles(db, coords)
+    rows = [existing_map.get(cell, (None, None)) for cell in coords]
+
+    center_lats, center_lngs = axial_to_lat_lng_batch(disk_q, disk_r)
+    payload = {
+        "coordinate_scale": WORLD_GRID_COORDINATE_SCALE,
+        "ids": [tile_id for tile_id, _ in rows],
+        "owner_ids": [owner_id for _, owner_id in rows],
+        "centers": fixed_point_pairs_batch(center_lats, center_lngs, WORLD_GRID_COORDINATE_SCALE),
     }
+    if include_boundaries:
+        boundary_lats, boundary_lngs = axial_to_boundary_batch(disk_q, disk_r)
+        payload["boundaries"] = fixed_point_pairs_batch(boundary_lats, boundary_lngs, WORLD_GRID_COORDINATE_SCALE)
+    return payload
+
+
+async def _load_disk_tiles(db: AsyncSession, coords: list[tuple[int, int]]) -> dict[tuple[int, int], tuple[int, int | None]]:
+    existing_tiles = await db.execute(
+        select(HexTile.id, HexTile.q, HexTile.r, HexTile.owner_id).where(tuple_(HexTile.q, HexTile.r).in_(coords))
+    )
+    return {(q, r): (tile_id, owner_id) for tile_id, q, r, owner_id in existing_tiles}
 
 
 @router.post("/claim-by-location")
-def claim_by_location(
+async def claim_by_location(
     payload: ClaimByLocationRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ) -> dict:
-    enforce_rate_limit(scope="claim_by_location", subject_id=current_user.id, limit=8, window_seconds=30)
+    await enforce_rate_limit_async(scope="claim_by_location", subject_id=current_user.id)
     if payload.distance_m < WALK_CAPTURE_DISTANCE_METERS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -152,29 +624,30 @@ def claim_by_location(
         extra={"user_id": current_user.id, "q": q, "r": r, "distance_m": payload.distance_m},
     )
 
-    total_tiles_owned = 0
-    claimed = False
+    adjacent_owned = await index_has_adjacent_owner(current_user.id, q, r)
+    change = None
     try:
-        user, tile, total_tiles_owned, claimed = _claim_tile_tx(
-            db=db,
+        user, tile, change, college_tiles = await db.run_sync(
+            _claim_tile_tx,
             user_id=current_user.id,
             q=q,
             r=r,
             create_if_missing=True,
+            adjacent_owned=adjacent_owned,
         )
-        db.commit()
+        await db.commit()
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise
 
-    db.refresh(user)
-    db.refresh(tile)
+    await db.refresh(user)
+    await db.refresh(tile)
 
+    claimed = change is not None
     if claimed:
-        _update_leaderboard(user.id, total_tiles_owned)
+        await _after_claim_commit(user, college_tiles, [change])
 
-    center_lat, center_lng = axial_to_lat_lng(tile.q, tile.r)
-    boundary = axial_to_boundary(tile.q, tile.r)
+    [(center, boundary)] = _tile_geometry([tile.q], [tile.r])
 
     return {
         "claimed": claimed,
@@ -183,51 +656,176 @@ def claim_by_location(
             "q": tile.q,
             "r": tile.r,
             "owner_id": tile.owner_id,
-            "center": {"latitude": center_lat, "longitude": center_lng},
-            "boundary": [{"latitude": lat, "longitude": lng} for lat, lng in boundary],
+            "center": center,
+            "boundary": boundary,
         },
         "mana": user.mana,
     }
 
 
-def _claim_tile_tx(db: Session, user_id: int, q: int, r: int, create_if_missing: bool) -> tuple[User, HexTile, int, bool]:
-    user = db.query(User).filter(User.id == user_id).with_for_update().first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+def _tile_geometry(qs, rs) -> list[tuple[dict, list[dict]]]:
+    center_lats, center_lngs = axial_to_lat_lng_batch(qs, rs)
+    boundary_lats, boundary_lngs = axial_to_boundary_batch(qs, rs)
+
+    return [
+        (
+            {"latitude": center_lat, "longitude": center_lng},
+            [{"latitude": lat, "longitude": lng} for lat, lng in zip(lats, lngs)],
+        )
+        for center_lat, center_lng, lats, lngs in zip(
+            batch_to_list(center_lats),
+            batch_to_list(center_lngs),
+            batch_to_list(boundary_lats),
+            batch_to_list(boundary_lngs),
+        )
+    ]
+
+
+def _claim_tile_tx(
+    db: Session, user_id: int, q: int, r: int, create_if_missing: bool, adjacent_owned: bool = False
+) -> tuple[User, HexTile, dict | None, int | None]:
+    user = _lock_user(db, user_id)
 
     tile = db.query(HexTile).filter(HexTile.q == q, HexTile.r == r).with_for_update().first()
     if not tile:
         if not create_if_missing:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tile not found")
+            _reject_claim("not_found", status.HTTP_404_NOT_FOUND, "Tile not found")
         tile = HexTile(q=q, r=r, owner_id=None)
         db.add(tile)
         db.flush()
 
     if tile.owner_id == user.id:
-        total_tiles_owned = db.query(func.count(HexTile.id)).filter(HexTile.owner_id == user.id).scalar() or 0
-        return user, tile, total_tiles_owned, False
+        TILE_CLAIMS.labels("already_owned").inc()
+        return user, tile, None, None
 
     if tile.owner_id is not None:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tile is already owned")
+        _reject_claim("owned_by_other", status.HTTP_400_BAD_REQUEST, "Tile is already owned")
 
     if user.mana < CLAIM_COST:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Not enough mana")
+        _reject_claim("not_enough_mana", status.HTTP_400_BAD_REQUEST, "Not enough mana")
+
+    if user.tiles_owned > 0 and not adjacent_owned and not has_adjacent_owned_tile(db, user.id, q, r):
+        _reject_claim("not_adjacent", status.HTTP_400_BAD_REQUEST, "Must claim an adjacent tile")
+
+    _apply_claim(user, tile)
+    [change], college_tiles = _record_claims(db, user, [tile])
+    return user, tile, change, college_tiles
+
+
+def _claim_tiles_batch_tx(
+    db: Session, user_id: int, cells: list[tuple[int, int]], create_if_missing: bool = False
+) -> tuple[User, list[dict], list[dict], int | None]:
+    user = _lock_user(db, user_id)
+
+    # Existing targets are locked in (q, r) order, and missing ones are only
+    # inserted afterwards, also in (q, r) order, so overlapping batches cannot deadlock.
+    targets = sorted(set(cells))
+    tiles = {
+        (tile.q, tile.r): tile
+        for tile in db.query(HexTile)
+        .filter(tuple_(HexTile.q, HexTile.r).in_(targets))
+        .order_by(HexTile.q, HexTile.r)
+        .with_for_update()
+        .all()
+    }
+    # Only this user's claims can grow this set and they are serialized on the user row lock.
+    neighbors = {(q + dq, r + dr) for q, r in targets for dq, dr in AXIAL_DIRECTIONS}
+    owned = {
+        (row.q, row.r)
+        for row in db.query(HexTile.q, HexTile.r)
+        .filter(HexTile.owner_id == user.id, tuple_(HexTile.q, HexTile.r).in_(neighbors))
+        .all()
+    }
+
+    # Missing cells are decided as if they were unowned tiles; only the ones
+    # that end up claimed are inserted, so rejected cells never create rows.
+    decisions = []
+    claimed = []
+    created = []
+    for q, r in cells:
+        tile = tiles.get((q, r))
+        if tile is None and not create_if_missing:
+            result = "not_found"
+        elif tile is not None and tile.owner_id == user.id:
+            result = "already_owned"
+        elif tile is not None and tile.owner_id is not None:
+            result = "owned_by_other"
+        elif user.mana < CLAIM_COST:
+            result = "not_enough_mana"
+        elif user.tiles_owned > 0 and not any((q + dq, r + dr) in owned for dq, dr in AXIAL_DIRECTIONS):
+            result = "not_adjacent"
+        else:
+            if tile is None:
+                tile = tiles[(q, r)] = HexTile(q=q, r=r, owner_id=None)
+                created.append(tile)
+            _apply_claim(user, tile)
+            owned.add((q, r))
+            claimed.append(tile)
+            result = "claimed"
+        if result != "claimed":
+            TILE_CLAIMS.labels(result).inc()
+        decisions.append((q, r, tile, result))
+
+    if created:
+        db.add_all(sorted(created, key=lambda tile: (tile.q, tile.r)))
+        try:
+            db.flush()
+        except IntegrityError:
+            # Another walk created one of these cells first; its owner is unknown here.
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Tiles changed while claiming, try again")
+
+    results = [
+        {"q": q, "r": r, "tile_id": tile.id if tile else None, "result": result} for q, r, tile, result in decisions
+    ]
+    changes, college_tiles = _record_claims(db, user, claimed)
+    return user, results, changes, college_tiles
+
+
+def _reject_claim(result: str, status_code: int, detail: str) -> None:
+    TILE_CLAIMS.labels(result).inc()
+    raise HTTPException(status_code=status_code, detail=detail)
+
+
+def _lock_user(db: Session, user_id: int) -> User:
+    user = db.query(User).filter(User.id == user_id).with_for_update().first()
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    # Mana is about to be checked and spent, so pending regeneration is materialized first.
+    apply_passive_regen(user)
+    return user
 
-    if user_owns_any_tile(db, user.id) and not has_adjacent_owned_tile(db, user.id, q, r):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Must claim an adjacent tile")
 
+def _apply_claim(user: User, tile: HexTile) -> None:
     user.mana -= CLAIM_COST
+    user.tiles_owned += 1
     tile.owner_id = user.id
+
+
+def _record_claims(db: Session, user: User, tiles: list[HexTile]) -> tuple[list[dict], int | None]:
+    if not tiles:
+        return [], None
+    # Shared rows are locked in the same order on every claim path: chunks
+    # sorted, then the college.
+    chunk_cells = {chunk_of(tile.q, tile.r): (tile.q, tile.r) for tile in tiles}
+    for chunk in sorted(chunk_cells):
+        bump_chunk_version(db, *chunk_cells[chunk])
+    college_tiles = None
     if user.college_id is not None:
         college = db.query(College).filter(College.id == user.college_id).with_for_update().first()
         if college:
-            college.total_tiles += 1
-    total_tiles_owned = db.query(func.count(HexTile.id)).filter(HexTile.owner_id == user.id).scalar() or 0
-    return user, tile, total_tiles_owned, True
-
-
-def _update_leaderboard(user_id: int, total_tiles_owned: int) -> None:
-    try:
-        get_redis_client().zadd(TILES_OWNED_LEADERBOARD_KEY, {str(user_id): total_tiles_owned})
-    except RedisError:
-        logger.exception("leaderboard_update_failed", extra={"user_id": user_id})
+            college.total_tiles += len(tiles)
+            college_tiles = college.total_tiles
+    return [append_tile_change(db, tile) for tile in tiles], college_tiles
+
+
+async def _after_claim_commit(user: User, college_tiles: int | None, changes: list[dict]) -> None:
+    # Successes are counted only once committed; rejections as they are decided.
+    TILE_CLAIMS.labels("claimed").inc(len(changes))
+    cache = get_world_grid_cache()
+    for change in changes:
+        cache.invalidate_cell(change["q"], change["r"])
+    await record_tile_owners(changes)
+    broker = get_tile_event_broker()
+    for change in changes:
+        await broker.publish(change)
+    record_claim_scores(user.id, user.tiles_owned, user.college_id, college_tiles)
@@ -1,12 +1,23 @@
 from pydantic import BaseModel, Field
 
+MAX_CLAIM_BATCH_TILES = 50
+MAX_TRACE_POLYLINE_LENGTH = 200_000
+
 
 class ClaimTileRequest(BaseModel):
     q: int
     r: int
 
 
+class ClaimBatchRequest(BaseModel):
+    tiles: list[ClaimTileRequest] = Field(min_length=1, max_length=MAX_CLAIM_BATCH_TILES)
+
+
 class ClaimByLocationRequest(BaseModel):
     latitude: float = Field(ge=-85.0, le=85.0)
     longitude: float = Field(ge=-180.0, le=180.0)
     distance_m: float = Field(ge=0.0, le=200.0)
+
+
+class ClaimTraceRequest(BaseModel):
+    polyline: str = Field(min_length=1, max_length=MAX_TRACE_POLYLINE_LENGTH)
@@ -1,10 +1,16 @@
 import math
+from functools import lru_cache
 
 from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 
 from app.game.models import HexTile
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only when numpy is unavailable
+    np = None
+
 CLAIM_COST = 20
 WALK_CAPTURE_DISTANCE_METERS = 20.0
 HEX_EDGE_LENGTH_METERS = 20.0
@@ -17,6 +23,13 @@ AXIAL_DIRECTIONS = [
     (-1, 1),
     (0, 1),
 ]
+HEX_CORNER_UNIT_OFFSETS = tuple(
+    (math.cos(math.radians(60 * i - 30)), math.sin(math.radians(60 * i - 30))) for i in range(6)
+)
+
+if np is not None:
+    _HEX_CORNER_COS = np.array([dx for dx, _ in HEX_CORNER_UNIT_OFFSETS], dtype=np.float64)
+    _HEX_CORNER_SIN = np.array([dy for _, dy in HEX_CORNER_UNIT_OFFSETS], dtype=np.float64)
 
 
 def has_adjacent_owned_tile(db: Session, owner_id: int, q: int, r: int) -> bool:
@@ -35,10 +48,6 @@ def has_adjacent_owned_tile(db: Session, owner_id: int, q: int, r: int) -> bool:
     return existing is not None
 
 
-def user_owns_any_tile(db: Session, owner_id: int) -> bool:
-    return db.query(HexTile.id).filter(HexTile.owner_id == owner_id).first() is not None
-
-
 def mercator_from_lat_lng(latitude: float, longitude: float) -> tuple[float, float]:
     lat_rad = math.radians(max(min(latitude, 85.0), -85.0))
     lng_rad = math.radians(longitude)
@@ -94,10 +103,9 @@ def axial_to_boundary(q: int, r: int, edge_length_m: float = HEX_EDGE_LENGTH_MET
     center_y = edge_length_m * 1.5 * r
 
     points: list[tuple[float, float]] = []
-    for i in range(6):
-        angle = math.radians(60 * i - 30)
-        x = center_x + edge_length_m * math.cos(angle)
-        y = center_y + edge_length_m * math.sin(angle)
+    for dx, dy in HEX_CORNER_UNIT_OFFSETS:
+        x = center_x + edge_length_m * dx
+        y = center_y + edge_length_m * dy
         lat, lng = lat_lng_from_mercator(x, y)
         points.append((lat, lng))
     return points
@@ -111,3 +119,153 @@ def axial_disk(center_q: int, center_r: int, radius: int) -> list[tuple[int, int
         for dr in range(r_min, r_max + 1):
             cells.append((center_q + dq, center_r + dr))
     return cells
+
+
+def axial_distance(q1: int, r1: int, q2: int, r2: int) -> int:
+    dq = q1 - q2
+    dr = r1 - r2
+    return max(abs(dq), abs(dr), abs(dq + dr))
+
+
+def axial_line(start_q: int, start_r: int, end_q: int, end_r: int) -> list[tuple[int, int]]:
+    steps = axial_distance(start_q, start_r, end_q, end_r)
+    if steps == 0:
+        return [(start_q, start_r)]
+    # The nudge keeps samples off shared edges so ties round consistently.
+    start_q += 1e-6
+    start_r += 1e-6
+    return [
+        axial_round(start_q + (end_q - start_q) * i / steps, start_r + (end_r - start_r) * i / steps)
+        for i in range(steps + 1)
+    ]
+
+
+# Batch variants of the geometry above. With numpy they take and return arrays and
+# broadcast over every cell at once; without it they fall back to the scalar
+# functions and return plain lists with the same values and shapes.
+
+
+def batch_to_list(values) -> list:
+    if hasattr(values, "tolist"):
+        return values.tolist()
+    return list(values)
+
+
+def mercator_from_lat_lng_batch(latitudes, longitudes):
+    if np is None:
+        points = [mercator_from_lat_lng(lat, lng) for lat, lng in zip(latitudes, longitudes)]
+        return [x for x, _ in points], [y for _, y in points]
+
+    lat_rad = np.radians(np.clip(np.asarray(latitudes, dtype=np.float64), -85.0, 85.0))
+    lng_rad = np.radians(np.asarray(longitudes, dtype=np.float64))
+    x = EARTH_RADIUS_METERS * lng_rad
+    y = EARTH_RADIUS_METERS * np.log(np.tan((math.pi / 4.0) + (lat_rad / 2.0)))
+    return x, y
+
+
+def lat_lng_from_mercator_batch(xs, ys):
+    if np is None:
+        points = [lat_lng_from_mercator(x, y) for x, y in zip(xs, ys)]
+        return [lat for lat, _ in points], [lng for _, lng in points]
+
+    longitudes = np.degrees(np.asarray(xs, dtype=np.float64) / EARTH_RADIUS_METERS)
+    latitudes = np.degrees((2.0 * np.arctan(np.exp(np.asarray(ys, dtype=np.float64) / EARTH_RADIUS_METERS))) - (math.pi / 2.0))
+    return latitudes, longitudes
+
+
+def axial_round_batch(qs, rs):
+    if np is None:
+        cells = [axial_round(q, r) for q, r in zip(qs, rs)]
+        return [q for q, _ in cells], [r for _, r in cells]
+
+    x = np.asarray(qs, dtype=np.float64)
+    z = np.asarray(rs, dtype=np.float64)
+    y = -x - z
+
+    rx = np.round(x)
+    ry = np.round(y)
+    rz = np.round(z)
+
+    x_diff = np.abs(rx - x)
+    y_diff = np.abs(ry - y)
+    z_diff = np.abs(rz - z)
+
+    fix_x = (x_diff > y_diff) & (x_diff > z_diff)
+    fix_z = ~fix_x & ~(y_diff > z_diff)
+    rx = np.where(fix_x, -ry - rz, rx)
+    rz = np.where(fix_z, -rx - ry, rz)
+
+    return rx.astype(np.int64), rz.astype(np.int64)
+
+
+def lat_lng_to_axial_batch(latitudes, longitudes, edge_length_m: float = HEX_EDGE_LENGTH_METERS):
+    if np is None:
+        cells = [lat_lng_to_axial(lat, lng, edge_length_m) for lat, lng in zip(latitudes, longitudes)]
+        return [q for q, _ in cells], [r for _, r in cells]
+
+    x, y = mercator_from_lat_lng_batch(latitudes, longitudes)
+    q = ((math.sqrt(3.0) / 3.0) * x - (1.0 / 3.0) * y) / edge_length_m
+    r = ((2.0 / 3.0) * y) / edge_length_m
+    return axial_round_batch(q, r)
+
+
+def _axial_to_mercator_batch(qs, rs, edge_length_m: float):
+    q = np.asarray(qs, dtype=np.float64)
+    r = np.asarray(rs, dtype=np.float64)
+    x = edge_length_m * math.sqrt(3.0) * (q + (r / 2.0))
+    y = edge_length_m * 1.5 * r
+    return x, y
+
+
+def axial_to_lat_lng_batch(qs, rs, edge_length_m: float = HEX_EDGE_LENGTH_METERS):
+    if np is None:
+        centers = [axial_to_lat_lng(q, r, edge_length_m) for q, r in zip(qs, rs)]
+        return [lat for lat, _ in centers], [lng for _, lng in centers]
+
+    x, y = _axial_to_mercator_batch(qs, rs, edge_length_m)
+    return lat_lng_from_mercator_batch(x, y)
+
+
+def axial_to_boundary_batch(qs, rs, edge_length_m: float = HEX_EDGE_LENGTH_METERS):
+    if np is None:
+        boundaries = [axial_to_boundary(q, r, edge_length_m) for q, r in zip(qs, rs)]
+        return (
+            [[lat for lat, _ in boundary] for boundary in boundaries],
+            [[lng for _, lng in boundary] for boundary in boundaries],
+        )
+
+    center_x, center_y = _axial_to_mercator_batch(qs, rs, edge_length_m)
+    x = center_x[:, np.newaxis] + edge_length_m * _HEX_CORNER_COS
+    y = center_y[:, np.newaxis] + edge_length_m * _HEX_CORNER_SIN
+    return lat_lng_from_mercator_batch(x, y)
+
+
+def fixed_point_pairs_batch(latitudes, longitudes, scale: int) -> list[int]:
+    # Interleaves [lat0, lng0, lat1, lng1, ...] as integers scaled by `scale`;
+    # nested per-cell lists, such as boundaries, are flattened in order.
+    if np is None:
+        flat_lats = [value for item in latitudes for value in (item if isinstance(item, list) else [item])]
+        flat_lngs = [value for item in longitudes for value in (item if isinstance(item, list) else [item])]
+        return [round(value * scale) for pair in zip(flat_lats, flat_lngs) for value in pair]
+
+    pairs = np.stack([np.asarray(latitudes, dtype=np.float64), np.asarray(longitudes, dtype=np.float64)], axis=-1)
+    return np.rint(pairs * scale).astype(np.int64).ravel().tolist()
+
+
+@lru_cache(maxsize=32)
+def _disk_offsets(radius: int):
+    offsets = axial_disk(0, 0, radius)
+    dq = np.array([q for q, _ in offsets], dtype=np.int64)
+    dr = np.array([r for _, r in offsets], dtype=np.int64)
+    dq.setflags(write=False)
+    dr.setflags(write=False)
+    return dq, dr
+
+
+def axial_disk_batch(center_q: int, center_r: int, radius: int):
+    if np is None:
+        cells = axial_disk(center_q, center_r, radius)
+        return [q for q, _ in cells], [r for _, r in cells]
+
+    dq, dr = _disk_offsets(radius)
+    return dq + center_q, dr + center_r
@@ -0,0 +1,62 @@
+import struct
+from itertools import chain
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only when numpy is unavailable
+    np = None
+
+# Layout: an 8-byte header (magic, format version, record size) followed by
+# fixed-width little-endian int32 records of (id, q, r, owner_id) until the end
+# of the body. Records are streamed, so the header carries no count. User ids
+# start at 1, which leaves owner_id 0 free to mean "unowned".
+SNAPSHOT_MEDIA_TYPE = "application/octet-stream"
+SNAPSHOT_MAGIC = b"SRGS"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<4sHH")
+SNAPSHOT_RECORD = struct.Struct("<iiii")
+SNAPSHOT_UNOWNED = 0
+
+if np is not None:
+    SNAPSHOT_DTYPE = np.dtype([("id", "<i4"), ("q", "<i4"), ("r", "<i4"), ("owner_id", "<i4")])
+
+
+def encode_snapshot_header() -> bytes:
+    return SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, SNAPSHOT_RECORD.size)
+
+
+def encode_snapshot_records(rows: list[tuple[int, int, int, int]]) -> bytes:
+    # Rows must already carry SNAPSHOT_UNOWNED instead of None for owner_id.
+    if np is None:
+        return struct.pack(f"<{len(rows) * 4}i", *chain.from_iterable(rows))
+    return np.asarray(rows, dtype="<i4").reshape(-1, 4).tobytes()
+
+
+def decode_snapshot(data: bytes) -> list[tuple[int, int, int, int | None]]:
+    body = _snapshot_body(data)
+    return [
+        (tile_id, q, r, None if owner_id == SNAPSHOT_UNOWNED else owner_id)
+        for tile_id, q, r, owner_id in SNAPSHOT_RECORD.iter_unpack(body)
+    ]
+
+
+def decode_snapshot_array(data: bytes):
+    # Zero-copy column view for tooling; unowned tiles keep owner_id 0.
+    if np is None:
+        raise RuntimeError("numpy is required to decode a snapshot into an array")
+    return np.frombuffer(_snapshot_body(data), dtype=SNAPSHOT_DTYPE)
+
+
+def _snapshot_body(data: bytes) -> memoryview:
+    if len(data) < SNAPSHOT_HEADER.size:
+        raise ValueError("Snapshot is missing its header")
+    magic, version, record_size = SNAPSHOT_HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Not a tile snapshot")
+    if version != SNAPSHOT_VERSION or record_size != SNAPSHOT_RECORD.size:
+        raise ValueError(f"Unsupported snapshot version {version} with record size {record_size}")
+
+    body = memoryview(data)[SNAPSHOT_HEADER.size :]
+    if len(body) % record_size:
+        raise ValueError("Snapshot ends with a partial record")
+    return body
@@ -0,0 +1,73 @@
+import argparse
+
+from redis.exceptions import RedisError
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.auth.models import User
+from app.core.redis_client import get_redis_client
+from app.database.session import SessionLocal
+from app.game.models import HexTile
+from app.leaderboard.constants import TILES_OWNED_LEADERBOARD_KEY
+
+
+def find_tiles_owned_drift(db: Session) -> list[tuple[int, int, int]]:
+    owned = (
+        select(HexTile.owner_id, func.count(HexTile.id).label("total"))
+        .where(HexTile.owner_id.is_not(None))
+        .group_by(HexTile.owner_id)
+        .subquery()
+    )
+    actual = func.coalesce(owned.c.total, 0)
+    rows = db.execute(
+        select(User.id, User.tiles_owned, actual)
+        .outerjoin(owned, owned.c.owner_id == User.id)
+        .where(User.tiles_owned != actual)
+        .order_by(User.id)
+    ).all()
+    return [(user_id, counter, total) for user_id, counter, total in rows]
+
+
+def repair_tiles_owned(db: Session, user_id: int) -> int | None:
+    # Claims lock the user row before changing ownership, so recounting under
+    # the same lock cannot miss a claim that is still in flight.
+    if db.execute(select(User.id).where(User.id == user_id).with_for_update()).first() is None:
+        return None
+    total = db.execute(select(func.count(HexTile.id)).where(HexTile.owner_id == user_id)).scalar_one()
+    db.execute(update(User).where(User.id == user_id).values(tiles_owned=total))
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check users.tiles_owned against hex_tiles ownership.")
+    parser.add_argument("--repair", action="store_true", help="rewrite drifted counters and leaderboard scores")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        drift = find_tiles_owned_drift(db)
+        db.rollback()
+        for user_id, counter, total in drift:
+            print(f"user {user_id}: tiles_owned={counter} actual={total}")
+        if not args.repair:
+            print(f"Found {len(drift)} users with drifted tiles_owned.")
+            return
+
+        repaired = 0
+        for user_id, _, _ in drift:
+            total = repair_tiles_owned(db, user_id)
+            db.commit()
+            if total is None:
+                continue
+            repaired += 1
+            try:
+                get_redis_client().zadd(TILES_OWNED_LEADERBOARD_KEY, {str(user_id): total})
+            except RedisError:
+                print(f"user {user_id}: leaderboard update failed")
+        print(f"Repaired {repaired} users with drifted tiles_owned.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
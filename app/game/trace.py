@@ -0,0 +1,96 @@
+import math
+
+from app.game.service import (
+    EARTH_RADIUS_METERS,
+    axial_distance,
+    axial_line,
+    batch_to_list,
+    lat_lng_to_axial_batch,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only when numpy is unavailable
+    np = None
+
+POLYLINE_PRECISION = 5
+MAX_TRACE_POINTS = 20000
+MAX_TRACE_CELLS = 200
+
+
+def decode_polyline(encoded: str, precision: int = POLYLINE_PRECISION) -> tuple[list[float], list[float]]:
+    # Google's encoded polyline format: zig-zag varints of coordinate deltas,
+    # five bits per character offset by 63.
+    factor = 10**precision
+    latitudes: list[float] = []
+    longitudes: list[float] = []
+    lat = lng = 0
+    index = 0
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            shift = 0
+            value = 0
+            while True:
+                if index >= length:
+                    raise ValueError("Truncated polyline")
+                byte = ord(encoded[index]) - 63
+                index += 1
+                if byte < 0 or byte > 63:
+                    raise ValueError("Invalid polyline character")
+                value |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(value >> 1) if value & 1 else value >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        if abs(lat) > 85 * factor or abs(lng) > 180 * factor:
+            raise ValueError("Polyline coordinate out of range")
+        latitudes.append(lat / factor)
+        longitudes.append(lng / factor)
+        if len(latitudes) > MAX_TRACE_POINTS:
+            raise ValueError("Polyline has too many points")
+    return latitudes, longitudes
+
+
+def trace_distance_meters(latitudes: list[float], longitudes: list[float]) -> float:
+    if len(latitudes) < 2:
+        return 0.0
+    if np is None:
+        return sum(
+            _haversine_meters(lat1, lng1, lat2, lng2)
+            for lat1, lng1, lat2, lng2 in zip(latitudes, longitudes, latitudes[1:], longitudes[1:])
+        )
+
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lng = np.radians(np.asarray(longitudes, dtype=np.float64))
+    a = np.sin(np.diff(lat) / 2.0) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lng) / 2.0) ** 2
+    return float(np.sum(2.0 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))))
+
+
+def _haversine_meters(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2.0) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_METERS * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def trace_cells(latitudes: list[float], longitudes: list[float]) -> list[tuple[int, int]]:
+    qs, rs = lat_lng_to_axial_batch(latitudes, longitudes)
+    cells: dict[tuple[int, int], None] = {}
+    previous = None
+    for q, r in zip(batch_to_list(qs), batch_to_list(rs)):
+        if previous is None:
+            cells[(q, r)] = None
+        elif previous != (q, r):
+            if axial_distance(*previous, q, r) > MAX_TRACE_CELLS:
+                raise ValueError("Trace crosses too many cells")
+            # Consecutive fixes can skip cells when GPS samples are sparse.
+            for cell in axial_line(*previous, q, r)[1:]:
+                cells[cell] = None
+        if len(cells) > MAX_TRACE_CELLS:
+            raise ValueError("Trace crosses too many cells")
+        previous = (q, r)
+    return list(cells)
@@ -1 +1,2 @@
 TILES_OWNED_LEADERBOARD_KEY = "leaderboard:tiles_owned"
+COLLEGE_TILES_LEADERBOARD_KEY = "leaderboard:college_tiles"
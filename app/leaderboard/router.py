@@ -1,19 +1,106 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, status
 
-from app.core.redis_client import get_redis_client
-from app.leaderboard.constants import TILES_OWNED_LEADERBOARD_KEY
+from app.auth.dependencies import get_current_user_async
+from app.auth.principals import Principal
+from app.leaderboard.service import LEADERBOARD_PAGE_MAX_LIMIT, page_entries, rank_with_neighbors, top_entries
 
 router = APIRouter()
 
+LEADERBOARD_DEFAULT_LIMIT = 10
+LEADERBOARD_MAX_NEIGHBORS = 25
+
 
 @router.get("/top-users")
-def top_users() -> dict:
-    redis_client = get_redis_client()
-    rows = redis_client.zrevrange(TILES_OWNED_LEADERBOARD_KEY, 0, 9, withscores=True)
+async def top_users(limit: int = LEADERBOARD_DEFAULT_LIMIT) -> dict:
+    _check_limit(limit)
+    return {"users": _user_rows(await top_entries("users", limit))}
+
+
+@router.get("/users")
+async def list_users(cursor: str | None = None, limit: int = LEADERBOARD_DEFAULT_LIMIT) -> dict:
+    _check_limit(limit)
+    entries, next_after = await page_entries("users", _parse_cursor(cursor), limit)
+    return {"users": _user_rows(entries), "next_cursor": _format_cursor(next_after)}
+
+
+@router.get("/users/me")
+async def my_user_rank(
+    neighbors: int = 2,
+    current_user: Principal = Depends(get_current_user_async),
+) -> dict:
+    _check_neighbors(neighbors)
+    own, entries = await rank_with_neighbors("users", current_user.id, neighbors)
+    return {
+        "rank": own["rank"] if own else None,
+        "tiles_owned": own["tiles_owned"] if own else 0,
+        "users": _user_rows(entries),
+    }
+
+
+@router.get("/top-colleges")
+async def top_colleges(limit: int = LEADERBOARD_DEFAULT_LIMIT) -> dict:
+    _check_limit(limit)
+    return {"colleges": _college_rows(await top_entries("colleges", limit))}
+
+
+@router.get("/colleges")
+async def list_colleges(cursor: str | None = None, limit: int = LEADERBOARD_DEFAULT_LIMIT) -> dict:
+    _check_limit(limit)
+    entries, next_after = await page_entries("colleges", _parse_cursor(cursor), limit)
+    return {"colleges": _college_rows(entries), "next_cursor": _format_cursor(next_after)}
+
 
+@router.get("/colleges/me")
+async def my_college_rank(
+    neighbors: int = 2,
+    current_user: Principal = Depends(get_current_user_async),
+) -> dict:
+    _check_neighbors(neighbors)
+    if current_user.college_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User has not joined a college")
+    own, entries = await rank_with_neighbors("colleges", current_user.college_id, neighbors)
     return {
-        "users": [
-            {"user_id": int(user_id), "tiles_owned": int(score)}
-            for user_id, score in rows
-        ]
+        "college_id": current_user.college_id,
+        "rank": own["rank"] if own else None,
+        "total_tiles": own["tiles_owned"] if own else 0,
+        "colleges": _college_rows(entries),
     }
+
+
+def _user_rows(entries: list[dict]) -> list[dict]:
+    return [{"rank": entry["rank"], "user_id": entry["id"], "tiles_owned": entry["tiles_owned"]} for entry in entries]
+
+
+def _college_rows(entries: list[dict]) -> list[dict]:
+    return [{"rank": entry["rank"], "college_id": entry["id"], "total_tiles": entry["tiles_owned"]} for entry in entries]
+
+
+def _check_limit(limit: int) -> None:
+    if limit < 1 or limit > LEADERBOARD_PAGE_MAX_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit must be between 1 and {LEADERBOARD_PAGE_MAX_LIMIT}",
+        )
+
+
+def _check_neighbors(neighbors: int) -> None:
+    if neighbors < 0 or neighbors > LEADERBOARD_MAX_NEIGHBORS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"neighbors must be between 0 and {LEADERBOARD_MAX_NEIGHBORS}",
+        )
+
+
+def _parse_cursor(cursor: str | None) -> tuple[int, int] | None:
+    # Cursors are the "score:id" of the last entry on the previous page.
+    if cursor is None:
+        return None
+    try:
+        score, member_id = cursor.split(":")
+        return int(score), int(member_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _format_cursor(after: tuple[int, int] | None) -> str | None:
+    return None if after is None else f"{after[0]}:{after[1]}"
@@ -0,0 +1,174 @@
+import os
+from functools import lru_cache
+
+from sqlalchemy import select
+
+from app.auth.models import User
+from app.college.models import College
+from app.core.cache import TTLCache
+from app.core.redis_client import get_async_redis_client, get_redis_client
+from app.database.session import SessionLocal
+from app.leaderboard.constants import COLLEGE_TILES_LEADERBOARD_KEY, TILES_OWNED_LEADERBOARD_KEY
+from app.leaderboard.writer import get_leaderboard_writer
+
+LEADERBOARD_KEYS = {
+    "users": TILES_OWNED_LEADERBOARD_KEY,
+    "colleges": COLLEGE_TILES_LEADERBOARD_KEY,
+}
+LEADERBOARD_TOP_CACHE_SIZE = 100
+LEADERBOARD_PAGE_MAX_LIMIT = 100
+LEADERBOARD_REBUILD_BATCH_SIZE = 5000
+
+# Pages continue after the last (score, member) returned rather than at a rank,
+# so members climbing past the cursor between requests do not shift later
+# pages. Equal scores are ordered by member, descending. The ties still ahead
+# of the cursor are skipped by rank while its member keeps that score, and by
+# scanning the ties once it has moved. Returns {rank offset, member, score, ...}.
+PAGE_AFTER_SCRIPT = """
+local score = tonumber(ARGV[1])
+local member = ARGV[2]
+local above = redis.call('ZCOUNT', KEYS[1], '(' .. ARGV[1], '+inf')
+local skip = 0
+if tonumber(redis.call('ZSCORE', KEYS[1], member)) == score then
+    skip = redis.call('ZREVRANK', KEYS[1], member) - above + 1
+else
+    for _, tie in ipairs(redis.call('ZREVRANGEBYSCORE', KEYS[1], ARGV[1], ARGV[1])) do
+        if tie < member then
+            break
+        end
+        skip = skip + 1
+    end
+end
+local rows = redis.call('ZREVRANGEBYSCORE', KEYS[1], ARGV[1], '-inf', 'WITHSCORES', 'LIMIT', skip, ARGV[3])
+table.insert(rows, 1, above + skip)
+return rows
+"""
+
+
+@lru_cache
+def get_top_entries_cache() -> TTLCache:
+    ttl_seconds = float(os.getenv("LEADERBOARD_TOP_CACHE_TTL_SECONDS", "2"))
+    return TTLCache(max_entries=len(LEADERBOARD_KEYS), ttl_seconds=ttl_seconds)
+
+
+@lru_cache
+def _page_after_script():
+    return get_async_redis_client().register_script(PAGE_AFTER_SCRIPT)
+
+
+def record_claim_scores(user_id: int, tiles_owned: int, college_id: int | None, college_tiles: int | None) -> None:
+    # Scores are absolute totals read under the claim's row locks; the writer
+    # flushes them in the background with ZADD GT.
+    writer = get_leaderboard_writer()
+    writer.submit(TILES_OWNED_LEADERBOARD_KEY, user_id, tiles_owned)
+    if college_id is not None and college_tiles is not None:
+        writer.submit(COLLEGE_TILES_LEADERBOARD_KEY, college_id, college_tiles)
+
+
+async def top_entries(board: str, limit: int) -> list[dict]:
+    if limit > LEADERBOARD_TOP_CACHE_SIZE:
+        return await _range_entries(board, 0, limit)
+    cache = get_top_entries_cache()
+    entries = cache.get(board)
+    if entries is None:
+        entries = await _range_entries(board, 0, LEADERBOARD_TOP_CACHE_SIZE)
+        cache.set(board, entries)
+    return entries[:limit]
+
+
+async def page_entries(
+    board: str, after: tuple[int, int] | None, limit: int
+) -> tuple[list[dict], tuple[int, int] | None]:
+    if after is None:
+        entries = await top_entries(board, limit + 1)
+    else:
+        entries = _cached_entries_after(board, after, limit + 1)
+        if entries is None:
+            entries = await _entries_after(board, after, limit + 1)
+    next_after = None
+    if len(entries) > limit:
+        last = entries[limit - 1]
+        next_after = (last["tiles_owned"], last["id"])
+    return entries[:limit], next_after
+
+
+async def rank_with_neighbors(board: str, member_id: int, span: int) -> tuple[dict | None, list[dict]]:
+    rank = await get_async_redis_client().zrevrank(LEADERBOARD_KEYS[board], str(member_id))
+    if rank is None:
+        return None, []
+    start = max(0, rank - span)
+    entries = await _range_entries(board, start, rank + span + 1 - start)
+    own = next((entry for entry in entries if entry["id"] == member_id), None)
+    return own, entries
+
+
+async def _range_entries(board: str, offset: int, count: int) -> list[dict]:
+    rows = await get_async_redis_client().zrevrange(
+        LEADERBOARD_KEYS[board], offset, offset + count - 1, withscores=True
+    )
+    return _entry_rows(rows, offset)
+
+
+def _cached_entries_after(board: str, after: tuple[int, int], count: int) -> list[dict] | None:
+    entries = get_top_entries_cache().get(board)
+    if entries is None:
+        return None
+    index = next((index for index, entry in enumerate(entries) if (entry["tiles_owned"], entry["id"]) == after), None)
+    if index is None or index + 1 + count > len(entries):
+        return None
+    return entries[index + 1 : index + 1 + count]
+
+
+async def _entries_after(board: str, after: tuple[int, int], count: int) -> list[dict]:
+    score, member_id = after
+    offset, *flat = await _page_after_script()(keys=[LEADERBOARD_KEYS[board]], args=[score, str(member_id), count])
+    return _entry_rows(zip(flat[::2], flat[1::2]), offset)
+
+
+def _entry_rows(rows, offset: int) -> list[dict]:
+    return [
+        {"rank": offset + index + 1, "id": int(member), "tiles_owned": int(score)}
+        for index, (member, score) in enumerate(rows)
+    ]
+
+
+def rebuild_leaderboards() -> tuple[int, int]:
+    redis_client = get_redis_client()
+    db = SessionLocal()
+    try:
+        users = _rebuild_board(
+            redis_client,
+            TILES_OWNED_LEADERBOARD_KEY,
+            db.execute(select(User.id, User.tiles_owned).where(User.tiles_owned > 0)),
+        )
+        colleges = _rebuild_board(
+            redis_client,
+            COLLEGE_TILES_LEADERBOARD_KEY,
+            db.execute(select(College.id, College.total_tiles).where(College.total_tiles > 0)),
+        )
+        return users, colleges
+    finally:
+        db.close()
+
+
+def _rebuild_board(redis_client, key: str, result) -> int:
+    staging_key = f"{key}:rebuild"
+    redis_client.delete(staging_key)
+    total = 0
+    for rows in result.partitions(LEADERBOARD_REBUILD_BATCH_SIZE):
+        redis_client.zadd(staging_key, {str(member_id): score for member_id, score in rows})
+        total += len(rows)
+    if total:
+        redis_client.rename(staging_key, key)
+    else:
+        redis_client.delete(key)
+    return total
+
+
+def main() -> None:
+    users, colleges = rebuild_leaderboards()
+    print(f"Rebuilt leaderboards with {users} users and {colleges} colleges.")
+
+
+if __name__ == "__main__":
+    main()
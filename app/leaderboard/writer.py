@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import os
+from functools import lru_cache
+
+from redis.exceptions import RedisError
+
+from app.core.redis_client import get_async_redis_client
+
+SHUTDOWN_FLUSH_ATTEMPTS = 3
+
+logger = logging.getLogger("steprealm.leaderboard.writer")
+
+
+# Leaderboard scores are buffered per member and written by one background task,
+# so claims never wait on Redis. Scores are absolute and only grow, which lets
+# the buffer keep just the highest pending value per member and lets a failed
+# batch be merged back and retried without double counting.
+class LeaderboardWriter:
+    def __init__(self, batch_size: int, flush_interval_seconds: float, max_backoff_seconds: float) -> None:
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._pending: dict[tuple[str, str], int] = {}
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self.flushed = 0
+        self.failed_flushes = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def submit(self, key: str, member: int, score: int) -> None:
+        pending_key = (key, str(member))
+        if score > self._pending.get(pending_key, -1):
+            self._pending[pending_key] = score
+        if len(self._pending) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        self._wakeup = None
+
+    async def _run(self) -> None:
+        failures = 0
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if await self.flush():
+                failures = 0
+                continue
+            failures += 1
+            backoff = min(self.max_backoff_seconds, self.flush_interval_seconds * 2**failures)
+            try:
+                await asyncio.wait_for(self._wait_for_stop(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+
+        for _ in range(SHUTDOWN_FLUSH_ATTEMPTS):
+            if await self.flush():
+                return
+        logger.error("leaderboard_updates_dropped", extra={"pending": len(self._pending)})
+
+    async def _wait_for_stop(self) -> None:
+        while not self._stopping:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+    async def flush(self) -> bool:
+        if not self._pending:
+            return True
+        batch = self._pending
+        self._pending = {}
+
+        by_key: dict[str, dict[str, int]] = {}
+        for (key, member), score in batch.items():
+            by_key.setdefault(key, {})[member] = score
+        try:
+            async with get_async_redis_client().pipeline(transaction=False) as pipe:
+                for key, mapping in by_key.items():
+                    pipe.zadd(key, mapping, gt=True)
+                await pipe.execute()
+        except (RedisError, OSError):
+            self.failed_flushes += 1
+            logger.exception("leaderboard_flush_failed", extra={"pending": len(batch)})
+            for (key, member), score in batch.items():
+                self.submit(key, member, score)
+            return False
+        self.flushed += len(batch)
+        return True
+
+
+@lru_cache
+def get_leaderboard_writer() -> LeaderboardWriter:
+    return LeaderboardWriter(
+        batch_size=int(os.getenv("LEADERBOARD_FLUSH_BATCH_SIZE", "500")),
+        flush_interval_seconds=float(os.getenv("LEADERBOARD_FLUSH_INTERVAL_SECONDS", "0.5")),
+        max_backoff_seconds=float(os.getenv("LEADERBOARD_FLUSH_MAX_BACKOFF_SECONDS", "30")),
+    )
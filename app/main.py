@@ -1,20 +1,47 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.exceptions import HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
+from app.auth.hashing import get_password_hasher
 from app.auth.router import router as auth_router
+from app.auth.security import get_jwt_settings
 from app.college.router import router as college_router
 from app.core.logging import configure_logging
+from app.core.metrics import MetricsMiddleware, mark_process_dead, render_metrics
+from app.core.redis_client import get_async_redis_client
+from app.database.session import async_engine
+from app.game.events import get_tile_event_broker
 from app.game.router import router as game_router
 from app.leaderboard.router import router as leaderboard_router
+from app.leaderboard.writer import get_leaderboard_writer
 from app.mana.router import router as mana_router
 
 configure_logging()
 logger = logging.getLogger("steprealm.main")
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_jwt_settings()
+    tile_event_broker = get_tile_event_broker()
+    leaderboard_writer = get_leaderboard_writer()
+    await tile_event_broker.start()
+    await leaderboard_writer.start()
+    try:
+        yield
+    finally:
+        await tile_event_broker.stop()
+        await leaderboard_writer.stop()
+        get_password_hasher().shutdown()
+        await get_async_redis_client().aclose()
+        await async_engine.dispose()
+        mark_process_dead()
+
+
+app = FastAPI(lifespan=lifespan)
 
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -25,6 +52,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
@@ -34,6 +62,12 @@ app.include_router(game_router, prefix="/game", tags=["game"])
 app.include_router(leaderboard_router, prefix="/leaderboard", tags=["leaderboard"])
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
+
+
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(request: Request, exc: Exception) -> JSONResponse:
     logger.exception(
@@ -49,4 +83,4 @@ async def http_exception_handler(request: Request, exc: HTTPException) -> JSONRe
         "http_error",
         extra={"path": request.url.path, "method": request.method, "status_code": exc.status_code},
     )
-    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail}, headers=exc.headers)
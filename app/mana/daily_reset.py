@@ -0,0 +1,115 @@
+import argparse
+import logging
+import time
+
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.auth.models import User
+from app.database.session import SessionLocal
+
+DAILY_RESET_BATCH_SIZE = 1000
+
+logger = logging.getLogger("steprealm.mana.daily_reset")
+
+# Each batch is its own short transaction over one id range. Rows another request
+# holds locked are skipped rather than waited on; they are still due and get
+# picked up by the next pass. The predicate is idempotent, so a pass that dies
+# halfway can simply be run again.
+RESET_BATCH_SQL = text(
+    """
+    UPDATE users
+    SET daily_mana_earned = 0,
+        daily_mana_reset_on = (now() AT TIME ZONE users.timezone)::date
+    WHERE users.id IN (
+        SELECT id
+        FROM users
+        WHERE id > :after_id
+          AND id <= :through_id
+          AND daily_mana_reset_on < (now() AT TIME ZONE timezone)::date
+        ORDER BY id
+        FOR UPDATE SKIP LOCKED
+    )
+    """
+)
+
+
+def reset_daily_mana(batch_size: int = DAILY_RESET_BATCH_SIZE) -> tuple[int, int, int]:
+    db = SessionLocal()
+    scanned = 0
+    reset = 0
+    failed = 0
+    last_id = 0
+    try:
+        while True:
+            batch_ids = select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size).subquery()
+            through_id, count = db.execute(select(func.max(batch_ids.c.id), func.count())).one()
+            if not count:
+                return scanned, reset, failed
+            try:
+                result = db.execute(RESET_BATCH_SQL, {"after_id": last_id, "through_id": through_id})
+                db.commit()
+                reset += result.rowcount
+            except SQLAlchemyError:
+                # One bad row (say a zone PostgreSQL does not know) fails the
+                # whole batch, so the batch is retried a row at a time and only
+                # the rows that still fail are skipped.
+                db.rollback()
+                logger.exception("daily_reset_batch_failed", extra={"after_id": last_id, "through_id": through_id})
+                batch_reset, batch_failed = _reset_rows(db, last_id, through_id)
+                reset += batch_reset
+                failed += batch_failed
+            scanned += count
+            last_id = through_id
+    finally:
+        db.close()
+
+
+def _reset_rows(db: Session, after_id: int, through_id: int) -> tuple[int, int]:
+    reset = 0
+    failed = 0
+    batch_ids = select(User.id).where(User.id > after_id, User.id <= through_id).order_by(User.id)
+    user_ids = db.execute(batch_ids).scalars().all()
+    db.rollback()
+    for user_id in user_ids:
+        try:
+            result = db.execute(RESET_BATCH_SQL, {"after_id": user_id - 1, "through_id": user_id})
+            db.commit()
+            reset += result.rowcount
+        except SQLAlchemyError:
+            db.rollback()
+            failed += 1
+            logger.warning("daily_reset_row_failed", extra={"user_id": user_id})
+    return reset, failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reset daily_mana_earned for users past their local midnight.")
+    parser.add_argument("--batch-size", type=int, default=DAILY_RESET_BATCH_SIZE)
+    parser.add_argument("--every", type=float, default=None, help="repeat every N seconds instead of running once")
+    args = parser.parse_args()
+
+    while True:
+        started = time.monotonic()
+        try:
+            scanned, reset, failed = reset_daily_mana(args.batch_size)
+        except SQLAlchemyError:
+            # A pass that cannot reach the database must not end the loop.
+            if args.every is None:
+                raise
+            logger.exception("daily_reset_pass_failed")
+        else:
+            elapsed = time.monotonic() - started
+            rate = scanned / elapsed if elapsed > 0 else 0.0
+            print(
+                f"Reset {reset} of {scanned} users in {elapsed:.2f}s ({rate:.0f} rows/s), {failed} failed.",
+                flush=True,
+            )
+        if args.every is None:
+            return
+        time.sleep(max(0.0, args.every - (time.monotonic() - started)))
+
+
+if __name__ == "__main__":
+    main()
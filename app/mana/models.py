@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import CheckConstraint, DateTime, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.base import Base
+
+
+class StepDevice(Base):
+    __tablename__ = "step_devices"
+    __table_args__ = (
+        CheckConstraint("pending_steps >= 0", name="ck_step_devices_pending_steps_non_negative"),
+    )
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    device_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    last_sample_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    pending_steps: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
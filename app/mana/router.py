@@ -1,55 +1,144 @@
 import logging
+from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_current_user_async
 from app.auth.models import User
-from app.database.session import get_db
+from app.auth.principals import Principal
+from app.database.session import get_async_db, get_db
+from app.core.metrics import MANA_AWARDED
 from app.core.security import enforce_rate_limit
-from app.mana.schemas import AddStepsRequest
-from app.mana.service import apply_passive_regen, apply_step_bonus
+from app.mana.models import StepDevice
+from app.mana.schemas import AddStepsRequest, StepSamplesRequest
+from app.mana.service import (
+    MAX_SAMPLE_CLOCK_SKEW,
+    STEPS_PER_BONUS,
+    apply_step_bonus,
+    new_step_samples,
+    regenerated_mana,
+)
 
 router = APIRouter()
 logger = logging.getLogger("steprealm.mana")
 
 
+# Regeneration is a pure function of the stored fields, so reads compute it
+# without locking or writing the row; it is only materialized when mana is spent
+# or awarded.
+@router.get("")
+async def get_mana(current_user: Principal = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)) -> dict:
+    return await _current_mana(db, current_user.id)
+
+
 @router.post("/sync")
-def sync_mana(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> dict:
+async def sync_mana(current_user: Principal = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)) -> dict:
     logger.info("mana_sync_requested", extra={"user_id": current_user.id})
+    mana = await _current_mana(db, current_user.id)
+    logger.info("mana_sync_completed", extra={"user_id": current_user.id, "mana": mana["mana"]})
+    return mana
+
+
+async def _current_mana(db: AsyncSession, user_id: int) -> dict:
+    row = (
+        await db.execute(
+            select(User.mana, User.last_regen_time, User.daily_mana_earned).where(User.id == user_id)
+        )
+    ).first()
+    if not row:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    mana, last_regen_time = regenerated_mana(row.mana, row.last_regen_time, datetime.utcnow())
+
+    return {
+        "mana": mana,
+        "last_regen_time": last_regen_time,
+        "daily_mana_earned": row.daily_mana_earned,
+    }
+
+
+@router.post("/add-steps")
+def add_steps(payload: AddStepsRequest, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)) -> dict:
+    enforce_rate_limit(scope="add_steps", subject_id=current_user.id)
     try:
         user = db.query(User).filter(User.id == current_user.id).with_for_update().first()
         if not user:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-        apply_passive_regen(user)
+        awarded_mana = apply_step_bonus(user, payload.step_delta)
         db.commit()
     except Exception:
         db.rollback()
         raise
 
-    logger.info("mana_sync_completed", extra={"user_id": user.id, "mana": user.mana})
+    MANA_AWARDED.labels("add_steps").inc(awarded_mana)
 
     return {
         "mana": user.mana,
-        "last_regen_time": user.last_regen_time,
+        "daily_mana_earned": user.daily_mana_earned,
+        "awarded_mana": awarded_mana,
     }
 
 
-@router.post("/add-steps")
-def add_steps(payload: AddStepsRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> dict:
-    enforce_rate_limit(scope="add_steps", subject_id=current_user.id, limit=6, window_seconds=60)
+@router.post("/step-samples")
+def add_step_samples(
+    payload: StepSamplesRequest,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> dict:
+    enforce_rate_limit(scope="step_samples", subject_id=current_user.id)
+    if max(sample.recorded_at for sample in payload.samples) > datetime.utcnow() + MAX_SAMPLE_CLOCK_SKEW:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Sample timestamps cannot be in the future")
+
     try:
         user = db.query(User).filter(User.id == current_user.id).with_for_update().first()
         if not user:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-        awarded_mana = apply_step_bonus(user, payload.step_delta)
+        db.execute(
+            insert(StepDevice)
+            .values(user_id=user.id, device_id=payload.device_id, pending_steps=0)
+            .on_conflict_do_nothing(index_elements=[StepDevice.user_id, StepDevice.device_id])
+        )
+        device = (
+            db.query(StepDevice)
+            .filter(StepDevice.user_id == user.id, StepDevice.device_id == payload.device_id)
+            .with_for_update()
+            .one()
+        )
+
+        samples = new_step_samples([(sample.recorded_at, sample.steps) for sample in payload.samples], device.last_sample_at)
+        new_steps = sum(steps for _, steps in samples)
+        total_steps = device.pending_steps + new_steps
+        awarded_mana = apply_step_bonus(user, total_steps)
+        if samples:
+            device.last_sample_at = samples[-1][0]
+        device.pending_steps = total_steps % STEPS_PER_BONUS
         db.commit()
     except Exception:
         db.rollback()
         raise
 
+    MANA_AWARDED.labels("step_samples").inc(awarded_mana)
+
+    logger.info(
+        "step_samples_applied",
+        extra={
+            "user_id": user.id,
+            "device_id": payload.device_id,
+            "accepted": len(samples),
+            "duplicates": len(payload.samples) - len(samples),
+            "awarded_mana": awarded_mana,
+        },
+    )
+
     return {
+        "accepted": len(samples),
+        "duplicates": len(payload.samples) - len(samples),
+        "steps": new_steps,
+        "pending_steps": device.pending_steps,
+        "awarded_mana": awarded_mana,
         "mana": user.mana,
         "daily_mana_earned": user.daily_mana_earned,
-        "awarded_mana": awarded_mana,
     }
@@ -1,5 +1,26 @@
-from pydantic import BaseModel, Field
+from datetime import datetime, timezone
+
+from pydantic import BaseModel, Field, field_validator
+
+MAX_STEP_SAMPLES = 500
 
 
 class AddStepsRequest(BaseModel):
     step_delta: int = Field(ge=0, le=20000)
+
+
+class StepSample(BaseModel):
+    recorded_at: datetime
+    steps: int = Field(ge=0, le=20000)
+
+    @field_validator("recorded_at")
+    @classmethod
+    def normalize_recorded_at(cls, value: datetime) -> datetime:
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
+class StepSamplesRequest(BaseModel):
+    device_id: str = Field(min_length=1, max_length=128)
+    samples: list[StepSample] = Field(min_length=1, max_length=MAX_STEP_SAMPLES)
@@ -1,4 +1,5 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
 
 from app.auth.models import User
 
@@ -8,32 +9,38 @@ MANA_CAP = 200
 STEPS_PER_BONUS = 1000
 BONUS_MANA_PER_CHUNK = 20
 DAILY_BONUS_CAP = 200
+MAX_SAMPLE_CLOCK_SKEW = timedelta(minutes=5)
 
 
-def apply_passive_regen(user: User) -> bool:
-    now = datetime.utcnow()
-
-    if user.mana >= MANA_CAP:
-        user.last_regen_time = now
-        return True
+def regenerated_mana(mana: int, last_regen_time: datetime, now: datetime) -> tuple[int, datetime]:
+    if mana >= MANA_CAP:
+        return mana, now
 
-    elapsed_seconds = (now - user.last_regen_time).total_seconds()
+    elapsed_seconds = (now - last_regen_time).total_seconds()
     ticks = int(elapsed_seconds // (TICK_MINUTES * 60))
     if ticks <= 0:
-        return False
-
-    regenerated = ticks * MANA_PER_TICK
-    new_mana = min(MANA_CAP, user.mana + regenerated)
+        return mana, last_regen_time
 
-    user.mana = new_mana
+    new_mana = min(MANA_CAP, mana + ticks * MANA_PER_TICK)
     if new_mana >= MANA_CAP:
-        user.last_regen_time = now
-    else:
-        user.last_regen_time = user.last_regen_time + timedelta(minutes=ticks * TICK_MINUTES)
-    return True
+        return new_mana, now
+    return new_mana, last_regen_time + timedelta(minutes=ticks * TICK_MINUTES)
+
+
+def apply_passive_regen(user: User) -> bool:
+    mana, last_regen_time = regenerated_mana(user.mana, user.last_regen_time, datetime.utcnow())
+    changed = mana != user.mana or last_regen_time != user.last_regen_time
+    user.mana = mana
+    user.last_regen_time = last_regen_time
+    return changed
+
+
+def local_today(timezone: str) -> date:
+    return datetime.now(ZoneInfo(timezone)).date()
 
 
 def apply_step_bonus(user: User, step_delta: int) -> int:
+    apply_passive_regen(user)
     available_bonus = max(0, DAILY_BONUS_CAP - user.daily_mana_earned)
     available_mana_space = max(0, MANA_CAP - user.mana)
     potential_bonus = (step_delta // STEPS_PER_BONUS) * BONUS_MANA_PER_CHUNK
@@ -45,3 +52,15 @@ def apply_step_bonus(user: User, step_delta: int) -> int:
     user.mana += bonus_to_award
     user.daily_mana_earned += bonus_to_award
     return bonus_to_award
+
+
+def new_step_samples(
+    samples: list[tuple[datetime, int]], last_sample_at: datetime | None
+) -> list[tuple[datetime, int]]:
+    # A device reports each interval once, keyed by its timestamp; anything at or
+    # below the device's high-water mark was already counted by an earlier sync.
+    by_time: dict[datetime, int] = {}
+    for recorded_at, steps in samples:
+        if last_sample_at is None or recorded_at > last_sample_at:
+            by_time.setdefault(recorded_at, steps)
+    return sorted(by_time.items())